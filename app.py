@@ -27,6 +27,7 @@ def create_app():
     from routes.budgets import budget_bp
     from routes.categories import category_bp
     from routes.bulk_upload import bulk_upload_bp
+    from routes.exports import export_bp
 
     app.register_blueprint(auth_bp)
     app.register_blueprint(txn_bp)
@@ -34,6 +35,7 @@ def create_app():
     app.register_blueprint(budget_bp)
     app.register_blueprint(category_bp)
     app.register_blueprint(bulk_upload_bp)
+    app.register_blueprint(export_bp)
 
     # Error handlers for stability
     @app.errorhandler(404)
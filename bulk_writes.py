@@ -0,0 +1,117 @@
+"""
+Bulk Writes - Shared High-Volume Inserts
+========================================
+One insert path for every writer that creates many rows at once
+(bulk upload staging, /api/transactions/batch), instead of building and
+flushing one ORM object per row.
+
+    rows = [new_transaction_row(user_id, record) for record in records]
+    bulk_insert_transactions(rows)
+    record_transaction_changes(user_id, added=[...])
+    db.session.commit()
+
+- On PostgreSQL (psycopg2) rows are streamed with COPY ... FROM STDIN,
+  BULK_INSERT_BATCH_SIZE rows per COPY, unless BULK_INSERT_USE_COPY is off.
+- Elsewhere, or with COPY disabled, each batch is one multi-row
+  INSERT ... VALUES statement.
+
+Both run on the session's own connection, so the rows commit (or roll
+back) together with the caller's ledger update in a single commit.
+Callers own the commit.
+"""
+
+import csv
+import uuid
+from io import StringIO
+
+from flask import current_app
+from sqlalchemy import insert
+
+from extensions import db
+from models import Transaction
+
+TRANSACTION_COLUMNS = (
+    "transaction_id",
+    "user_id",
+    "transaction_type",
+    "amount",
+    "category_id",
+    "transaction_date",
+    "description",
+)
+
+
+def new_transaction_row(user_id, record):
+    """
+    Full column dict for a new transaction.
+
+    Args:
+        record: dict with transaction_type, amount, category_id,
+            transaction_date and optionally description / transaction_id
+    """
+    row = {column: record.get(column) for column in TRANSACTION_COLUMNS}
+    row["user_id"] = user_id
+    if not row["transaction_id"]:
+        row["transaction_id"] = str(uuid.uuid4())
+    return row
+
+
+def _use_copy(connection):
+    return (
+        current_app.config.get("BULK_INSERT_USE_COPY", True)
+        and connection.dialect.name == "postgresql"
+        and connection.dialect.driver == "psycopg2"
+    )
+
+
+def _copy_batch(connection, model, columns, rows):
+    """COPY one batch of rows in CSV form (None -> unquoted empty -> NULL)"""
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([row[column] for column in columns])
+    buffer.seek(0)
+
+    cursor = connection.connection.driver_connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {model.__tablename__} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+    finally:
+        cursor.close()
+
+
+def bulk_insert_rows(model, columns, rows, batch_size=None):
+    """
+    Insert rows into a model's table in batches (does not commit).
+
+    Args:
+        model: Mapped class whose table receives the rows
+        columns: Column names; every row dict has exactly these keys
+        rows: list of dicts
+        batch_size: Rows per COPY / INSERT statement (default BULK_INSERT_BATCH_SIZE)
+
+    Returns:
+        Number of rows inserted
+    """
+    if not rows:
+        return 0
+
+    batch_size = batch_size or current_app.config.get("BULK_INSERT_BATCH_SIZE", 1000)
+    connection = db.session.connection()
+    use_copy = _use_copy(connection)
+
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        if use_copy:
+            _copy_batch(connection, model, columns, batch)
+        else:
+            db.session.execute(insert(model).values(batch))
+
+    return len(rows)
+
+
+def bulk_insert_transactions(rows, batch_size=None):
+    """Insert rows from new_transaction_row() (does not commit)"""
+    return bulk_insert_rows(Transaction, TRANSACTION_COLUMNS, rows, batch_size)
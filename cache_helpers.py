@@ -1,76 +1,174 @@
 """
-Cache Helpers - Cached Query Functions
-======================================
-This module provides cached versions of frequently accessed queries
-to improve application performance.
+Cache Helpers - Versioned Cache Keys
+====================================
+This module keeps a per-user data version: a counter bumped after every
+transaction, budget and category write. Cache keys that embed the
+version can never serve stale data, so nothing has to be deleted when
+data changes - old entries simply stop being read and expire.
 
-Functions decorated with @cache.memoize will cache results for the
-specified timeout period, reducing database load.
+The same version drives HTTP conditional GET: pages decorated with
+@conditional_on_data_version answer If-None-Match with 304 Not Modified
+before any query runs or any template renders.
 """
 
+import hashlib
+import time
+from datetime import date
+from functools import wraps
+
+from flask import current_app, make_response, request, session
+
 from extensions import cache
-from models import Category, User
+from db_routing import pin_reads_to_primary
+
 
+# ===== PER-USER DATA VERSION =====
 
-@cache.memoize(timeout=600)  # Cache for 10 minutes
-def get_all_categories():
+def _data_version_key(user_id):
+    return f"data_version:{user_id}"
+
+
+def _seed_data_version(key):
     """
-    Get all categories (system + user categories).
-    Cached for 10 minutes to reduce database queries.
+    Initialize a missing version from the clock (nanoseconds).
+    If the key was evicted, the new seed is still larger than any
+    version handed out before, so old cache entries are never reused.
     """
-    return Category.query.all()
+    cache.add(key, time.time_ns(), timeout=0)
+
 
+def get_data_version(user_id):
+    """Current data version for a user"""
+    key = _data_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        _seed_data_version(key)
+        version = cache.get(key)
+    return version
 
-@cache.memoize(timeout=600)
-def get_categories_by_type(category_type):
+
+def bump_data_version(user_id):
     """
-    Get categories filtered by type (CREDIT/DEBIT).
-    Cached for 10 minutes.
+    Advance a user's data version.
+    Call after db.session.commit() on every write path.
     """
-    return Category.query.filter_by(category_type=category_type).all()
+    key = _data_version_key(user_id)
+    if not cache.has(key):
+        _seed_data_version(key)
+    # Their next reads must see this write, even before the replica does
+    pin_reads_to_primary(user_id)
+    # The backend's inc is atomic on Redis (INCR)
+    return cache.cache.inc(key)
+
+
+# ===== CATEGORY VERSION =====
+# Separate from the data version so transaction writes do not invalidate
+# category data. user_id=None versions the shared system categories.
+
+def _category_version_key(user_id):
+    return f"category_version:{user_id or 'system'}"
+
+
+def get_category_version(user_id):
+    """Current category version for a user (or the system categories)"""
+    key = _category_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        _seed_data_version(key)
+        version = cache.get(key)
+    return version
 
 
-@cache.memoize(timeout=600)
-def get_user_categories(user_id):
+def bump_category_version(user_id):
     """
-    Get all categories available to a specific user
-    (system categories + user's custom categories).
-    Cached for 10 minutes.
+    Advance a user's category version.
+    Call after db.session.commit() on every category write.
     """
-    return Category.query.filter(
-        (Category.user_id == None) | (Category.user_id == user_id)
-    ).all()
+    key = _category_version_key(user_id)
+    if not cache.has(key):
+        _seed_data_version(key)
+    return cache.cache.inc(key)
 
 
-@cache.memoize(timeout=600)
-def get_user_categories_by_type(user_id, category_type):
+# ===== HIT / MISS COUNTERS =====
+
+def record_cache_lookup(name, hit):
+    """Count a hit or miss for a named cache (shared across workers when using Redis)"""
+    cache.cache.inc(f"cache_stats:{name}:{'hits' if hit else 'misses'}")
+
+
+def get_cache_stats(name):
+    """Hit/miss counters and hit rate for a named cache"""
+    hits = cache.get(f"cache_stats:{name}:hits") or 0
+    misses = cache.get(f"cache_stats:{name}:misses") or 0
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / total * 100, 1) if total else 0.0
+    }
+
+
+# ===== CONDITIONAL GET (ETag / 304) =====
+
+def data_etag(user_id, *parts):
     """
-    Get user's available categories filtered by type.
-    Cached for 10 minutes.
+    Strong ETag for a user's page: data version plus whatever else the
+    rendered output depends on (path, query string, today's date, release).
     """
-    return Category.query.filter(
-        ((Category.user_id == None) | (Category.user_id == user_id)),
-        Category.category_type == category_type
-    ).all()
+    raw = ":".join(str(part) for part in (
+        user_id,
+        get_data_version(user_id),
+        current_app.config.get("ETAG_SALT", ""),
+        *parts
+    ))
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
 
 
-def clear_category_cache():
+def _etag_matches(etag):
     """
-    Clear all category-related caches.
-    Call this after creating, updating, or deleting categories.
+    True if the request's If-None-Match carries our ETag. Flask-Compress
+    suffixes strong ETags of compressed responses (":gzip", ":br"), so
+    the suffixed forms match as well.
     """
-    cache.delete_memoized(get_all_categories)
-    cache.delete_memoized(get_categories_by_type)
-    cache.delete_memoized(get_user_categories)
-    cache.delete_memoized(get_user_categories_by_type)
+    return any(
+        tag == etag or tag.startswith(f"{etag}:")
+        for tag in request.if_none_match.as_set()
+    )
 
 
-def invalidate_user_cache(user_id):
+def conditional_on_data_version(view):
     """
-    Invalidate cache for a specific user.
-    Call this after user-specific data changes.
+    Decorator for per-user GET pages whose output only changes when the
+    user's data version does. Returns 304 when the browser's copy is
+    current; otherwise runs the view and tags its response.
+
+    Skipped when there is no logged-in user (the view redirects) or when
+    flash messages are waiting to be shown.
     """
-    cache.delete_memoized(get_user_categories, user_id)
-    # Note: For category type variations, you'd need to clear all types
-    cache.delete_memoized(get_user_categories_by_type, user_id, 'CREDIT')
-    cache.delete_memoized(get_user_categories_by_type, user_id, 'DEBIT')
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        user_id = session.get("user_id")
+        if request.method != "GET" or not user_id or session.get("_flashes"):
+            return view(*args, **kwargs)
+
+        etag = data_etag(
+            user_id,
+            session.get("username", ""),
+            request.path,
+            sorted(request.args.items(multi=True)),
+            date.today().isoformat()
+        )
+
+        if _etag_matches(etag):
+            response = current_app.response_class(status=304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "private, no-cache"
+        return response
+
+    return wrapper
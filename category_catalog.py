@@ -0,0 +1,135 @@
+"""
+Category Catalog - Per-User Cached Categories
+=============================================
+Every page that lists or validates categories goes through
+get_category_catalog(user_id) instead of querying the categories table.
+
+A catalog holds the categories a user can see (system categories plus
+their own) as plain picklable records, with:
+- by_type("CREDIT" / "DEBIT")      lists sorted by name
+- get(category_id)                 lookup by id
+- name_map(category_type=None)     lowercase name -> category_id
+- parent_choices(exclude_id=None)  top-level categories
+
+Catalogs are cached under the user's category version and the system
+category version (cache_helpers.get_category_version). Category writes
+call invalidate_category_catalog(user_id) after commit; the next read
+rebuilds the catalog with one query. Changes made to system categories
+outside the app (create_default_categories.py) show up once
+CATEGORY_CATALOG_CACHE_TIMEOUT expires, or immediately after
+invalidate_category_catalog(None).
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from flask import current_app
+
+from extensions import db, cache
+from cache_helpers import get_category_version, bump_category_version
+from models import Category
+
+@dataclass
+class CatalogCategory:
+    """Read-only view of a category; mirrors the Category attributes templates use"""
+    category_id: int
+    category_name: str
+    category_type: str
+    user_id: Optional[str] = None
+    icon: Optional[str] = None
+    color: Optional[str] = None
+    parent_category_id: Optional[int] = None
+    parent: Optional["CatalogCategory"] = None
+
+    def is_system_category(self):
+        return self.user_id is None
+
+    def is_user_category(self):
+        return self.user_id is not None
+
+
+@dataclass
+class CategoryCatalog:
+    """All categories visible to one user, sorted by (type, name)"""
+    categories: List[CatalogCategory] = field(default_factory=list)
+    _by_id: Dict[int, CatalogCategory] = field(default_factory=dict, init=False, repr=False)
+
+    def __post_init__(self):
+        self._by_id = {category.category_id: category for category in self.categories}
+        for category in self.categories:
+            if category.parent_category_id is not None:
+                category.parent = self._by_id.get(category.parent_category_id)
+
+    def __iter__(self):
+        return iter(self.categories)
+
+    def __len__(self):
+        return len(self.categories)
+
+    def get(self, category_id):
+        return self._by_id.get(category_id)
+
+    def by_type(self, category_type):
+        return [category for category in self.categories if category.category_type == category_type]
+
+    def name_map(self, category_type=None):
+        """
+        Lowercase category name -> category_id. When a custom category
+        shares a name with a system one, the user's own category wins.
+        """
+        names = {}
+        for category in sorted(self.categories, key=lambda c: c.is_user_category()):
+            if category_type is None or category.category_type == category_type:
+                names[category.category_name.lower()] = category.category_id
+        return names
+
+    def parent_choices(self, exclude_id=None):
+        """Top-level categories (only these can be parents)"""
+        return [
+            category for category in self.categories
+            if category.parent_category_id is None and category.category_id != exclude_id
+        ]
+
+
+def _catalog_key(user_id):
+    return (
+        f"category_catalog:{user_id}:"
+        f"{get_category_version(user_id)}:{get_category_version(None)}"
+    )
+
+
+def load_category_catalog(user_id):
+    """Build a user's catalog from the database (one query)"""
+    rows = (
+        db.session.query(
+            Category.category_id,
+            Category.category_name,
+            Category.category_type,
+            Category.user_id,
+            Category.icon,
+            Category.color,
+            Category.parent_category_id
+        )
+        .filter((Category.user_id == None) | (Category.user_id == user_id))
+        .order_by(Category.category_type, Category.category_name)
+        .all()
+    )
+    return CategoryCatalog([CatalogCategory(**row._asdict()) for row in rows])
+
+
+def get_category_catalog(user_id):
+    """A user's category catalog, from cache when their categories have not changed"""
+    key = _catalog_key(user_id)
+    catalog = cache.get(key)
+    if catalog is None:
+        catalog = load_category_catalog(user_id)
+        cache.set(key, catalog, timeout=current_app.config.get("CATEGORY_CATALOG_CACHE_TIMEOUT", 3600))
+    return catalog
+
+
+def invalidate_category_catalog(user_id):
+    """
+    Drop cached catalogs after a category write (call after commit).
+    user_id=None invalidates every user's view of the system categories.
+    """
+    bump_category_version(user_id)
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -12,6 +13,13 @@ class Config:
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Optional read replica: read-only views send their SELECTs here
+    # (see db_routing.py); users are pinned to the primary for
+    # REPLICA_STICKY_SECONDS after their own writes
+    DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+    SQLALCHEMY_BINDS = {"replica": DATABASE_REPLICA_URL} if DATABASE_REPLICA_URL else {}
+    REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", 10))
+
     # ===== DATABASE CONNECTION POOLING =====
     # Optimize database connections for better performance and stability
     SQLALCHEMY_ENGINE_OPTIONS = {
@@ -28,13 +36,88 @@ class Config:
 
     # ===== FLASK-CACHING CONFIGURATION =====
     # Cache frequently accessed data for better performance
-    CACHE_TYPE = os.getenv("CACHE_TYPE", "SimpleCache")  # Use Redis in production
+    # SimpleCache is per process: only valid with a single worker. The
+    # per-user data and category versions (cache_helpers.py) live here, so
+    # with several workers a write would bump the version in one process
+    # only and the others would keep serving stale dashboards, counts and
+    # 304s for old ETags. Use Redis whenever more than one worker runs.
+    CACHE_TYPE = os.getenv("CACHE_TYPE", "SimpleCache")
     CACHE_DEFAULT_TIMEOUT = 300  # 5 minutes default cache timeout
     CACHE_KEY_PREFIX = "financetracker_"
 
     # Redis configuration (if using Redis cache)
     CACHE_REDIS_URL = os.getenv("REDIS_URL", None)
 
+    # Dashboard results are cached per (user, data version, date range);
+    # entries never go stale, the timeout only bounds memory use
+    DASHBOARD_CACHE_TIMEOUT = int(os.getenv("DASHBOARD_CACHE_TIMEOUT", 600))
+
+    # Per-widget timeouts for /api/dashboard/<widget> (seconds);
+    # widgets not listed use DASHBOARD_CACHE_TIMEOUT
+    DASHBOARD_WIDGET_CACHE_TIMEOUTS = {
+        'daily-trend': 600,
+        'categories': 600,
+        'weekly': 1800,
+        'monthly': 3600,
+        'budget-comparison': 600,
+    }
+
+    # Result counts on /transactions: "exact", "capped" or "estimate"
+    # (estimate uses the PostgreSQL planner above the cap)
+    TRANSACTION_COUNT_STRATEGY = os.getenv("TRANSACTION_COUNT_STRATEGY", "capped")
+    TRANSACTION_COUNT_CAP = int(os.getenv("TRANSACTION_COUNT_CAP", 10000))
+    TRANSACTION_COUNT_CACHE_TIMEOUT = 120  # Short TTL; keys also carry the data version
+
+    # Largest operations list accepted by /api/transactions/batch
+    TRANSACTION_BATCH_MAX_OPERATIONS = int(os.getenv("TRANSACTION_BATCH_MAX_OPERATIONS", 500))
+
+    # Bulk transaction inserts (bulk_writes.py): rows per COPY / multi-row
+    # INSERT, and whether PostgreSQL uses COPY FROM STDIN
+    BULK_INSERT_BATCH_SIZE = int(os.getenv("BULK_INSERT_BATCH_SIZE", 1000))
+    BULK_INSERT_USE_COPY = os.getenv("BULK_INSERT_USE_COPY", "True") == "True"
+
+    # /export-transactions streams history straight from a server-side
+    # cursor: rows fetched per round trip, and CSV rows per flushed chunk
+    EXPORT_FETCH_BATCH_SIZE = int(os.getenv("EXPORT_FETCH_BATCH_SIZE", 1000))
+    EXPORT_FLUSH_ROWS = 500
+
+    # Background export jobs (/exports): worker threads per process, where
+    # finished reports are written, and how long an undownloaded one lives
+    EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", 2))
+    EXPORT_ARTIFACT_DIR = os.getenv("EXPORT_ARTIFACT_DIR", os.path.join(tempfile.gettempdir(), "finance_exports"))
+    EXPORT_ARTIFACT_TTL = 900  # 15 minutes
+
+    # Bulk uploads (upload_ingest.py): largest accepted file, rows validated
+    # and inserted per chunk, where uploads are spooled while they are
+    # read, and how many row errors the results page lists
+    UPLOAD_MAX_FILE_SIZE = int(os.getenv("UPLOAD_MAX_FILE_SIZE", 200 * 1024 * 1024))
+    UPLOAD_CHUNK_ROWS = int(os.getenv("UPLOAD_CHUNK_ROWS", 5000))
+    UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "finance_uploads"))
+    UPLOAD_MAX_REPORTED_ERRORS = 1000
+    # Excel reader (upload_readers.py): "auto" (calamine when installed,
+    # else openpyxl), or an engine name to force one
+    UPLOAD_EXCEL_ENGINE = os.getenv("UPLOAD_EXCEL_ENGINE", "auto")
+
+    # Background import jobs (import_jobs.py): worker threads per process,
+    # how long a running job may go without a heartbeat before another
+    # process takes it over, how many times it is retried, and how long
+    # the valid rows of a file with errors stay staged
+    IMPORT_WORKERS = int(os.getenv("IMPORT_WORKERS", 2))
+    IMPORT_JOB_STALE_SECONDS = int(os.getenv("IMPORT_JOB_STALE_SECONDS", 300))
+    IMPORT_JOB_MAX_ATTEMPTS = 3
+    IMPORT_STAGING_TTL = 3 * 86400  # 3 days
+
+    # Per-user category catalogs are keyed by category version, so this
+    # only bounds memory use (and staleness after out-of-app system edits)
+    CATEGORY_CATALOG_CACHE_TIMEOUT = 3600
+
+    # Bulk upload templates are cached as bytes per (category versions,
+    # month, format); the timeout only bounds memory use
+    UPLOAD_TEMPLATE_CACHE_TIMEOUT = 86400
+
+    # Mixed into page ETags so a new release invalidates browser copies
+    ETAG_SALT = os.getenv("RELEASE_VERSION", os.getenv("RENDER_GIT_COMMIT", ""))
+
     # ===== SESSION CONFIGURATION =====
     # Improve session security and performance
     SESSION_COOKIE_SECURE = os.getenv("SESSION_COOKIE_SECURE", "False") == "True"  # HTTPS only in production
@@ -44,7 +127,9 @@ class Config:
 
     # ===== REQUEST CONFIGURATION =====
     # Stability improvements
-    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file upload size
+    # Largest request body; bulk uploads are the biggest requests, so this
+    # follows UPLOAD_MAX_FILE_SIZE (plus room for the multipart envelope)
+    MAX_CONTENT_LENGTH = UPLOAD_MAX_FILE_SIZE + 1024 * 1024
 
     # Email Configuration (Flask-Mail)
     MAIL_SERVER = os.getenv("MAIL_SERVER", "smtp.gmail.com")
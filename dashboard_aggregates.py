@@ -0,0 +1,441 @@
+"""
+Dashboard Aggregates - Dashboard Engine
+=======================================
+Computes the figures shown on /dashboard with a constant number of
+queries, no matter how many widgets the page grows.
+
+The page is split in two:
+- Headline figures (DashboardStats) rendered with the page itself:
+  balance, period expenses, budget alerts and recent activity.
+- Chart widgets (WIDGETS) served as JSON from /api/dashboard/<widget>
+  and fetched by the browser in parallel after the page has loaded.
+
+The balance is a primary-key read of the user_balances ledger. Bucketed
+sums (period expenses, weekly and monthly series) are conditional
+aggregates (SUM over CASE buckets) evaluated in one scan of the user's
+daily rollups, bounded to the oldest bucket needed. Reading
+daily_rollups instead of raw transactions keeps the cost proportional
+to days of history, not number of transactions.
+
+Headline and widgets are each cached keyed by the user's data version
+(see cache_helpers.py), so repeat views skip the database. Widgets get
+their own timeouts from DASHBOARD_WIDGET_CACHE_TIMEOUTS.
+"""
+
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import List, Optional
+
+from flask import current_app
+from sqlalchemy import func, case, and_
+
+from extensions import db, cache
+from cache_helpers import get_data_version, record_cache_lookup
+from models import Transaction, Category, Budget, DailyRollup
+from ledger import get_balance
+
+
+@dataclass
+class DashboardRange:
+    """Resolved date filter for the dashboard"""
+    start: date
+    end: date
+    from_display: Optional[str] = None
+    to_display: Optional[str] = None
+
+
+@dataclass
+class DashboardStats:
+    """Headline figures rendered with the dashboard page"""
+    today: date
+    balance: Decimal = Decimal("0")
+    current_month_expense: Decimal = Decimal("0")
+    last_month_expense: Decimal = Decimal("0")
+    last_year_expense: Decimal = Decimal("0")
+    recent_transactions: List[tuple] = field(default_factory=list)
+    budget_alerts: List[dict] = field(default_factory=list)
+
+    def template_context(self):
+        """Keyword arguments for render_template('dashboard.html', ...)"""
+        return {
+            "today": self.today,
+            "balance": round(self.balance, 2),
+            "current_month_expense": round(self.current_month_expense, 2),
+            "last_month_expense": round(self.last_month_expense, 2),
+            "last_year_expense": round(self.last_year_expense, 2),
+            "recent_transactions": self.recent_transactions,
+            "budget_alerts": self.budget_alerts,
+        }
+
+
+# =========================
+# Date helpers
+# =========================
+
+def month_bounds(year, month):
+    """First and last day of a calendar month"""
+    first_day = date(year, month, 1)
+    if month == 12:
+        last_day = date(year, 12, 31)
+    else:
+        last_day = date(year, month + 1, 1) - timedelta(days=1)
+    return first_day, last_day
+
+
+def resolve_dashboard_range(args, today):
+    """
+    Resolve the dashboard date filter from request args
+    (preset, from_date, to_date). Defaults to the current month.
+    """
+    preset = args.get("preset")
+    from_date_str = args.get("from_date")
+    to_date_str = args.get("to_date")
+
+    if preset == "last7days":
+        filter_start = today - timedelta(days=7)
+        filter_end = today
+    elif preset == "last30days":
+        filter_start = today - timedelta(days=30)
+        filter_end = today
+    elif preset == "thismonth":
+        filter_start = today.replace(day=1)
+        filter_end = today
+    elif preset == "lastmonth":
+        first_day_current = today.replace(day=1)
+        filter_end = first_day_current - timedelta(days=1)
+        filter_start = filter_end.replace(day=1)
+    elif preset == "thisyear":
+        filter_start = date(today.year, 1, 1)
+        filter_end = today
+    elif from_date_str or to_date_str:
+        filter_start = datetime.strptime(from_date_str, "%Y-%m-%d").date() if from_date_str else date(2000, 1, 1)
+        filter_end = datetime.strptime(to_date_str, "%Y-%m-%d").date() if to_date_str else today
+    else:
+        # Default: current month
+        filter_start = today.replace(day=1)
+        filter_end = today
+        from_date_str = None
+        to_date_str = None
+
+    return DashboardRange(
+        start=filter_start,
+        end=filter_end,
+        from_display=filter_start.strftime("%Y-%m-%d") if (from_date_str or preset) else None,
+        to_display=filter_end.strftime("%Y-%m-%d") if (to_date_str or preset) else None,
+    )
+
+
+def weekly_buckets(today):
+    """Last 8 weeks, oldest first"""
+    eight_weeks_ago = today - timedelta(weeks=8)
+    buckets = []
+    for i in range(8):
+        week_start = eight_weeks_ago + timedelta(weeks=i)
+        buckets.append((f"Week {i+1}", week_start, week_start + timedelta(days=6)))
+    return buckets
+
+
+def monthly_buckets(today):
+    """Last 6 calendar months including the current one, oldest first"""
+    buckets = []
+    for i in range(5, -1, -1):
+        month_index = today.year * 12 + (today.month - 1) - i
+        first_day, last_day = month_bounds(month_index // 12, month_index % 12 + 1)
+        buckets.append((first_day.strftime('%b %Y'), first_day, last_day))
+    return buckets
+
+
+# =========================
+# Aggregation primitives
+# =========================
+
+def _debit_between(start, end):
+    """SUM of DEBIT rollups whose date falls in [start, end]"""
+    return func.coalesce(
+        func.sum(
+            case(
+                (
+                    and_(
+                        DailyRollup.transaction_type == "DEBIT",
+                        DailyRollup.rollup_date >= start,
+                        DailyRollup.rollup_date <= end
+                    ),
+                    DailyRollup.total_amount
+                ),
+                else_=0
+            )
+        ),
+        0
+    )
+
+
+def debit_bucket_totals(user_id, buckets):
+    """
+    DEBIT totals for several date buckets in a single rollup scan.
+
+    Args:
+        buckets: list of (first_day, last_day)
+
+    Returns:
+        list of Decimal totals, in bucket order
+    """
+    oldest = min(start for start, _ in buckets)
+    newest = max(end for _, end in buckets)
+
+    totals = (
+        db.session.query(*[_debit_between(start, end) for start, end in buckets])
+        .filter(
+            DailyRollup.user_id == user_id,
+            DailyRollup.rollup_date >= oldest,
+            DailyRollup.rollup_date <= newest
+        )
+        .one()
+    )
+    return [total or 0 for total in totals]
+
+
+def _daily_category_breakdown(user_id, date_range):
+    """DEBIT rollups in range grouped by (date, category name)"""
+    return (
+        db.session.query(
+            DailyRollup.rollup_date,
+            Category.category_name,
+            func.coalesce(func.sum(DailyRollup.total_amount), 0)
+        )
+        .join(Category, DailyRollup.category_id == Category.category_id)
+        .filter(
+            DailyRollup.user_id == user_id,
+            DailyRollup.transaction_type == "DEBIT",
+            DailyRollup.rollup_date >= date_range.start,
+            DailyRollup.rollup_date <= date_range.end
+        )
+        .group_by(DailyRollup.rollup_date, Category.category_name)
+        .all()
+    )
+
+
+def _budget_spending(user_id, today):
+    """Current month budgets with actual spending: (limit, category name, spent)"""
+    return (
+        db.session.query(
+            Budget.monthly_limit,
+            Category.category_name,
+            func.coalesce(func.sum(DailyRollup.total_amount), 0).label('actual_spent')
+        )
+        .join(Category, Budget.category_id == Category.category_id)
+        .outerjoin(DailyRollup, (DailyRollup.category_id == Budget.category_id) &
+                   (DailyRollup.user_id == user_id) &
+                   (DailyRollup.transaction_type == "DEBIT") &
+                   (DailyRollup.rollup_date >= today.replace(day=1)) &
+                   (DailyRollup.rollup_date <= today))
+        .filter(Budget.user_id == user_id,
+                Budget.month == today.month,
+                Budget.year == today.year)
+        .group_by(Budget.category_id, Budget.monthly_limit, Category.category_name)
+        .all()
+    )
+
+
+# =========================
+# Headline figures
+# =========================
+
+def compute_dashboard_stats(user_id, date_range, today=None):
+    """
+    Build the headline DashboardStats for a user and DashboardRange.
+
+    Issues four queries: balance lookup, one scalar-bucket scan,
+    budgets and recent activity.
+    """
+    today = today or date.today()
+    stats = DashboardStats(today=today)
+
+    first_day_current_month = today.replace(day=1)
+    last_day_last_month = first_day_current_month - timedelta(days=1)
+    first_day_last_month = last_day_last_month.replace(day=1)
+
+    stats.balance = get_balance(user_id)
+
+    (
+        stats.current_month_expense,
+        stats.last_month_expense,
+        stats.last_year_expense,
+    ) = debit_bucket_totals(user_id, [
+        (date_range.start, date_range.end),
+        (first_day_last_month, last_day_last_month),
+        month_bounds(today.year - 1, today.month),  # Last year same month
+    ])
+
+    stats.recent_transactions = [
+        tuple(row) for row in (
+            db.session.query(
+                Transaction.transaction_type,
+                Transaction.amount,
+                Category.category_name
+            )
+            .join(Category, Transaction.category_id == Category.category_id)
+            .filter(Transaction.user_id == user_id)
+            .order_by(Transaction.transaction_date.desc())
+            .limit(5)
+            .all()
+        )
+    ]
+
+    for monthly_limit, category_name, actual_spent in _budget_spending(user_id, today):
+        percentage = (float(actual_spent) / float(monthly_limit) * 100) if monthly_limit > 0 else 0
+
+        if percentage >= 80:
+            stats.budget_alerts.append({
+                'category_name': category_name,
+                'percentage': round(percentage, 1),
+                'spent': float(actual_spent),
+                'limit': float(monthly_limit),
+                'status': 'danger' if percentage > 100 else 'warning'
+            })
+
+    return stats
+
+
+# =========================
+# Chart widgets
+# =========================
+
+def widget_daily_trend(user_id, date_range, today):
+    """Daily DEBIT totals across the filtered period"""
+    daily_totals = {}
+    for rollup_date, _, amount in _daily_category_breakdown(user_id, date_range):
+        daily_totals[rollup_date] = daily_totals.get(rollup_date, 0) + float(amount)
+
+    days = sorted(daily_totals)
+    return {
+        "labels": [str(d) for d in days],
+        "values": [daily_totals[d] for d in days],
+    }
+
+
+def widget_categories(user_id, date_range, today):
+    """DEBIT totals per category name across the filtered period"""
+    category_totals = {}
+    for _, category_name, amount in _daily_category_breakdown(user_id, date_range):
+        category_totals[category_name] = category_totals.get(category_name, 0) + float(amount)
+
+    names = sorted(category_totals)
+    return {
+        "labels": names,
+        "values": [category_totals[name] for name in names],
+    }
+
+
+def widget_weekly(user_id, date_range, today):
+    """Last 8 weeks of spending"""
+    weeks = weekly_buckets(today)
+    totals = debit_bucket_totals(user_id, [(start, end) for _, start, end in weeks])
+    return {
+        "weeks": [
+            {'week': label, 'amount': float(total)}
+            for (label, _, _), total in zip(weeks, totals)
+        ]
+    }
+
+
+def widget_monthly(user_id, date_range, today):
+    """Last 6 months of spending"""
+    months = monthly_buckets(today)
+    totals = debit_bucket_totals(user_id, [(start, end) for _, start, end in months])
+    return {
+        "months": [
+            {'month': label, 'amount': float(total)}
+            for (label, _, _), total in zip(months, totals)
+        ]
+    }
+
+
+def widget_budget_comparison(user_id, date_range, today):
+    """Budget vs actual for the current month"""
+    comparison = []
+    total_budgeted = 0
+    total_actual = 0
+
+    for monthly_limit, category_name, actual_spent in _budget_spending(user_id, today):
+        total_budgeted += float(monthly_limit)
+        total_actual += float(actual_spent)
+        comparison.append({
+            'category': category_name,
+            'budget': float(monthly_limit),
+            'actual': float(actual_spent),
+            'variance': float(monthly_limit) - float(actual_spent)
+        })
+
+    return {
+        "budgets": comparison,
+        "total_budgeted": round(total_budgeted, 2),
+        "total_actual": round(total_actual, 2),
+    }
+
+
+# name -> (builder, depends on the filtered date range)
+WIDGETS = {
+    "daily-trend": (widget_daily_trend, True),
+    "categories": (widget_categories, True),
+    "weekly": (widget_weekly, False),
+    "monthly": (widget_monthly, False),
+    "budget-comparison": (widget_budget_comparison, False),
+}
+
+
+# =========================
+# Versioned cache
+# =========================
+
+def get_dashboard_stats(user_id, date_range, today=None):
+    """
+    Headline DashboardStats from cache when the user's data has not
+    changed since it was computed, otherwise compute and store it.
+
+    Returns:
+        (stats, cache_hit)
+    """
+    today = today or date.today()
+    cache_key = (
+        f"dashboard:{user_id}:{get_data_version(user_id)}:"
+        f"{date_range.start.isoformat()}:{date_range.end.isoformat()}:{today.isoformat()}"
+    )
+
+    stats = cache.get(cache_key)
+    record_cache_lookup("dashboard", stats is not None)
+    if stats is not None:
+        return stats, True
+
+    stats = compute_dashboard_stats(user_id, date_range, today)
+    cache.set(cache_key, stats, timeout=current_app.config.get("DASHBOARD_CACHE_TIMEOUT", 600))
+    return stats, False
+
+
+def get_dashboard_widget(name, user_id, date_range, today=None):
+    """
+    JSON payload for one chart widget, cached per data version with the
+    widget's own timeout.
+
+    Raises:
+        KeyError: unknown widget name
+
+    Returns:
+        (payload, cache_hit)
+    """
+    builder, uses_range = WIDGETS[name]
+    today = today or date.today()
+
+    cache_key = f"dashboard_widget:{name}:{user_id}:{get_data_version(user_id)}:{today.isoformat()}"
+    if uses_range:
+        cache_key += f":{date_range.start.isoformat()}:{date_range.end.isoformat()}"
+
+    payload = cache.get(cache_key)
+    record_cache_lookup("dashboard", payload is not None)
+    if payload is not None:
+        return payload, True
+
+    payload = builder(user_id, date_range, today)
+    timeouts = current_app.config.get("DASHBOARD_WIDGET_CACHE_TIMEOUTS", {})
+    cache.set(cache_key, payload, timeout=timeouts.get(name, current_app.config.get("DASHBOARD_CACHE_TIMEOUT", 600)))
+    return payload, False
@@ -0,0 +1,97 @@
+"""
+Database Routing - Read Replica Support
+=======================================
+Sends the SELECTs of read-only views to a PostgreSQL read replica when
+DATABASE_REPLICA_URL is configured (as the "replica" bind); everything
+else stays on the primary.
+
+- Views opt in with @reads_from_replica (dashboard, history, budgets,
+  categories, search, exports). Writes, auth and any view without the
+  decorator always use the primary.
+- Within a replica-routed request, only plain SELECTs go to the replica:
+  flushes, INSERT/UPDATE/DELETE, SELECT ... FOR UPDATE and raw SQL use
+  the primary, and once a session has written it stays on the primary.
+- Read-your-writes: every write path calls bump_data_version(), which
+  pins the user to the primary for REPLICA_STICKY_SECONDS, longer than
+  normal replication lag. Their next page shows their change even if the
+  replica has not caught up.
+
+Without a replica configured all of this is a no-op.
+"""
+
+from functools import wraps
+
+from flask import current_app, g, has_app_context, session
+from flask_sqlalchemy.session import Session
+
+REPLICA_BIND = "replica"
+
+
+def replica_configured():
+    return bool(current_app.config.get("SQLALCHEMY_BINDS", {}).get(REPLICA_BIND))
+
+
+class RoutingSession(Session):
+    """db.session class that can route a request's reads to the replica bind"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._routes_to_replica(clause):
+            return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _routes_to_replica(self, clause):
+        if not has_app_context() or not g.get("read_replica"):
+            return False
+
+        if self._flushing or self.info.get("wrote"):
+            return False
+
+        if clause is None or getattr(clause, "is_dml", False) or not getattr(clause, "is_select", False):
+            if clause is not None and getattr(clause, "is_dml", False):
+                self.info["wrote"] = True
+            return False
+
+        # Row locks only mean something on the primary
+        if getattr(clause, "_for_update_arg", None) is not None:
+            return False
+
+        return REPLICA_BIND in self._db.engines
+
+
+# =========================
+# Read-your-writes
+# =========================
+
+def _pin_key(user_id):
+    return f"primary_pin:{user_id}"
+
+
+def pin_reads_to_primary(user_id):
+    """Keep a user's reads on the primary for REPLICA_STICKY_SECONDS (after a write)"""
+    from extensions import cache  # deferred: extensions imports this module
+
+    if replica_configured():
+        cache.set(_pin_key(user_id), 1, timeout=current_app.config.get("REPLICA_STICKY_SECONDS", 10))
+
+
+def route_reads_to_replica(user_id):
+    """
+    Route this app context's reads to the replica, unless the user wrote
+    recently. Returns True if the replica will be used.
+    """
+    from extensions import cache  # deferred: extensions imports this module
+
+    use_replica = replica_configured() and not cache.get(_pin_key(user_id))
+    g.read_replica = use_replica
+    return use_replica
+
+
+def reads_from_replica(view):
+    """Decorator for read-only views: serve their queries from the replica"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        user_id = session.get("user_id")
+        if user_id:
+            route_reads_to_replica(user_id)
+        return view(*args, **kwargs)
+    return wrapper
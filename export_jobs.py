@@ -0,0 +1,235 @@
+"""
+Export Jobs - Background Report Generation
+==========================================
+Builds the financial report (CSV or XLSX) outside the request cycle so a
+long export does not hold a web worker.
+
+    submit_export()    -> queue a job, returns its state immediately
+    get_export_job()   -> poll status and row progress
+    claim_artifact()   -> take the finished file for a one-time download
+
+Jobs run on a small thread pool (EXPORT_WORKERS) inside each web process.
+Job state lives in the cache and finished files are written to
+EXPORT_ARTIFACT_DIR, where they are deleted on download, or after
+EXPORT_ARTIFACT_TTL if nobody collects them.
+
+Any worker can answer a poll or serve a download only if the cache is
+shared (Redis) and every worker sees the same EXPORT_ARTIFACT_DIR. With
+the default per-process SimpleCache, or a directory local to one
+instance, a request that reaches another worker gets 404 - multi-worker
+deployments need both (PERFORMANCE_GUIDE.md, Gunicorn Configuration).
+"""
+
+import csv
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from flask import current_app
+from sqlalchemy import func
+
+from extensions import db, cache
+from models import DailyRollup
+from financial_report import summary_rows, history_rows
+from db_routing import route_reads_to_replica
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=current_app.config.get("EXPORT_WORKERS", 2),
+                thread_name_prefix="export"
+            )
+        return _executor
+
+
+def _job_key(job_id):
+    return f"export_job:{job_id}"
+
+
+def _save_job(job):
+    timeout = current_app.config.get("EXPORT_ARTIFACT_TTL", 900) * 2
+    cache.set(_job_key(job["job_id"]), job, timeout=timeout)
+
+
+def _update_job(job_id, **changes):
+    job = cache.get(_job_key(job_id))
+    if job is not None:
+        job.update(changes)
+        _save_job(job)
+    return job
+
+
+def _artifact_dir():
+    path = current_app.config.get("EXPORT_ARTIFACT_DIR")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _expected_rows(user_id):
+    """Transaction count from rollups, for percent-complete"""
+    return int(
+        db.session.query(func.coalesce(func.sum(DailyRollup.txn_count), 0))
+        .filter(DailyRollup.user_id == user_id)
+        .scalar() or 0
+    )
+
+
+def purge_expired_artifacts():
+    """Delete report files nobody downloaded within EXPORT_ARTIFACT_TTL"""
+    ttl = current_app.config.get("EXPORT_ARTIFACT_TTL", 900)
+    cutoff = time.time() - ttl
+    directory = _artifact_dir()
+    removed = 0
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+        except FileNotFoundError:
+            continue
+    return removed
+
+
+# =========================
+# Report writers
+# =========================
+
+def _write_csv(path, header_rows, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerows(header_rows)
+        writer.writerows(rows)
+
+
+def _write_xlsx(path, header_rows, rows):
+    from openpyxl import Workbook
+
+    # write_only streams rows to disk instead of holding cells in memory
+    workbook = Workbook(write_only=True)
+    summary_sheet = workbook.create_sheet("Summary")
+    for row in header_rows:
+        summary_sheet.append(row)
+
+    history_sheet = workbook.create_sheet("Transactions")
+    for row in rows:
+        history_sheet.append(row)
+
+    workbook.save(path)
+
+
+REPORT_WRITERS = {
+    "csv": _write_csv,
+    "xlsx": _write_xlsx,
+}
+
+
+def _run_export(app, job_id):
+    with app.app_context():
+        job = _update_job(job_id, status="running", started_at=time.time())
+        if job is None:
+            return
+
+        route_reads_to_replica(job["user_id"])
+        path = os.path.join(_artifact_dir(), f"{job_id}.{job['format']}")
+        try:
+            today = date.fromisoformat(job["report_date"])
+            header_rows, _ = summary_rows(job["user_id"], job["username"], today)
+            rows = history_rows(
+                job["user_id"],
+                app.config.get("EXPORT_FETCH_BATCH_SIZE", 1000),
+                progress=lambda count: _update_job(job_id, rows=count)
+            )
+            REPORT_WRITERS[job["format"]](path, header_rows, rows)
+
+            job = _update_job(job_id, status="done", finished_at=time.time())
+            app.logger.info(f"Export job done - User: {job['username']}, Job: {job_id}, Format: {job['format']}, Transactions: {job['rows']}")
+
+        except Exception as e:
+            if os.path.exists(path):
+                os.remove(path)
+            _update_job(job_id, status="failed", error="Export failed", finished_at=time.time())
+            app.logger.error(f"Export job failed - Job: {job_id}, Error: {str(e)}")
+
+        finally:
+            db.session.remove()
+
+
+# =========================
+# Public API
+# =========================
+
+def submit_export(user_id, username, export_format):
+    """
+    Queue a report export for a user.
+
+    Returns:
+        The job state dict (status "queued")
+    """
+    purge_expired_artifacts()
+
+    job = {
+        "job_id": uuid.uuid4().hex,
+        "user_id": user_id,
+        "username": username,
+        "format": export_format,
+        "status": "queued",
+        "rows": 0,
+        "expected_rows": _expected_rows(user_id),
+        "report_date": date.today().isoformat(),
+        "created_at": time.time(),
+    }
+    _save_job(job)
+
+    app = current_app._get_current_object()
+    _get_executor().submit(_run_export, app, job["job_id"])
+    current_app.logger.info(f"Export job queued - User: {username}, Job: {job['job_id']}, Format: {export_format}")
+    return job
+
+
+def get_export_job(job_id, user_id):
+    """Job state for its owner, or None"""
+    job = cache.get(_job_key(job_id))
+    if job is None or job["user_id"] != user_id:
+        return None
+    return job
+
+
+def claim_artifact(job):
+    """
+    Take ownership of a finished report file for download.
+    The rename is atomic, so only one request can claim a given file.
+
+    Returns:
+        Path of the claimed file (caller deletes it), or None if the
+        file was already downloaded or has expired
+    """
+    directory = _artifact_dir()
+    path = os.path.join(directory, f"{job['job_id']}.{job['format']}")
+    claimed = os.path.join(directory, f"{job['job_id']}.{uuid.uuid4().hex}.sending")
+    try:
+        os.rename(path, claimed)
+    except FileNotFoundError:
+        return None
+
+    _update_job(job["job_id"], status="downloaded")
+    return claimed
+
+
+def report_download_name(job):
+    report_date = date.fromisoformat(job["report_date"])
+    return f'{job["username"]}_financial_report_{report_date.strftime("%Y%m%d")}.{job["format"]}'
@@ -4,9 +4,10 @@ from flask_jwt_extended import JWTManager
 from flask_mail import Mail
 from flask_caching import Cache
 from flask_compress import Compress
+from db_routing import RoutingSession
 
 # Initialize extensions
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 bcrypt = Bcrypt()
 jwt = JWTManager()
 mail = Mail()
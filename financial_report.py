@@ -0,0 +1,334 @@
+"""
+Financial Report - Streaming CSV Export
+=======================================
+Builds the /export-transactions report as a stream of CSV rows instead
+of one in-memory document.
+
+- compute_report_summary(): every figure for the summary, budget,
+                   category and insight sections from a fixed set of
+                   set-based queries (independent of budget count)
+- summary_rows():  renders those sections; small, computed up front so
+                   failures still return a clean 500
+- history_rows():  transaction history read through a server-side cursor
+                   (yield_per), one batch of rows in memory at a time
+- stream_csv():    encodes rows and flushes them in chunks
+
+Worker memory stays flat regardless of how long a user's history is, and
+the first bytes reach the client before the history is read.
+"""
+
+import csv
+from dataclasses import dataclass, field
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from typing import List, Tuple
+
+from sqlalchemy import func, case, and_
+
+from extensions import db
+from models import Transaction, Category, Budget, DailyRollup
+from ledger import get_balance
+
+
+def report_filename(username, today):
+    return f'{username}_financial_report_{today.strftime("%Y%m%d")}.csv'
+
+
+@dataclass
+class BudgetLine:
+    """One budget with what was spent against it this month"""
+    category_name: str
+    limit: Decimal
+    spent: Decimal
+
+    @property
+    def percentage(self):
+        return (float(self.spent) / float(self.limit) * 100) if self.limit > 0 else 0
+
+    @property
+    def remaining(self):
+        return float(self.limit) - float(self.spent)
+
+    @property
+    def status(self):
+        if self.percentage > 100:
+            return "OVER BUDGET"
+        if self.percentage >= 80:
+            return "WARNING"
+        return "ON TRACK"
+
+
+@dataclass
+class ReportSummary:
+    """Figures behind the summary, budget, category and insight sections"""
+    balance: Decimal = Decimal("0")
+    current_month_income: Decimal = Decimal("0")
+    current_month_expense: Decimal = Decimal("0")
+    last_month_expense: Decimal = Decimal("0")
+    budgets: List[BudgetLine] = field(default_factory=list)
+    category_spending: List[Tuple[str, Decimal]] = field(default_factory=list)
+
+    @property
+    def total_budget(self):
+        return sum(float(line.limit) for line in self.budgets)
+
+    @property
+    def total_spent_against_budget(self):
+        return sum(float(line.spent) for line in self.budgets)
+
+    @property
+    def over_budget_count(self):
+        return sum(1 for line in self.budgets if line.status == "OVER BUDGET")
+
+
+def _to_decimal(value):
+    if value is None:
+        return Decimal("0")
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def compute_report_summary(user_id, today):
+    """
+    All summary figures for the report in three queries, however many
+    budgets or categories the user has:
+    - balance (primary-key read of the ledger)
+    - one grouped rollup scan from the start of last month to today,
+      bucketing each category with conditional sums
+    - the month's budgets joined to their category names
+    Budget actuals are then looked up from the per-category totals.
+    """
+    first_day_current_month = today.replace(day=1)
+    first_day_last_month = (first_day_current_month - timedelta(days=1)).replace(day=1)
+    this_month = DailyRollup.rollup_date >= first_day_current_month
+    is_debit = DailyRollup.transaction_type == "DEBIT"
+
+    summary = ReportSummary(balance=get_balance(user_id))
+
+    per_category = (
+        db.session.query(
+            DailyRollup.category_id,
+            Category.category_name,
+            func.sum(case((and_(is_debit, this_month), DailyRollup.total_amount))).label("current_debit"),
+            func.sum(case((and_(is_debit, ~this_month), DailyRollup.total_amount))).label("last_debit"),
+            func.sum(case((and_(DailyRollup.transaction_type == "CREDIT", this_month), DailyRollup.total_amount))).label("current_credit")
+        )
+        .join(Category, DailyRollup.category_id == Category.category_id)
+        .filter(
+            DailyRollup.user_id == user_id,
+            DailyRollup.rollup_date >= first_day_last_month,
+            DailyRollup.rollup_date <= today
+        )
+        .group_by(DailyRollup.category_id, Category.category_name)
+        .all()
+    )
+
+    spent_by_category = {}
+    spending_by_name = {}
+    for row in per_category:
+        summary.current_month_expense += _to_decimal(row.current_debit)
+        summary.last_month_expense += _to_decimal(row.last_debit)
+        summary.current_month_income += _to_decimal(row.current_credit)
+        if row.current_debit is not None:
+            spent_by_category[row.category_id] = _to_decimal(row.current_debit)
+            # Same-named categories (system + custom) are reported together
+            spending_by_name[row.category_name] = (
+                spending_by_name.get(row.category_name, Decimal("0")) + _to_decimal(row.current_debit)
+            )
+
+    summary.category_spending = sorted(spending_by_name.items(), key=lambda item: item[1], reverse=True)
+
+    budgets = (
+        db.session.query(Budget.category_id, Budget.monthly_limit, Category.category_name)
+        .join(Category, Budget.category_id == Category.category_id)
+        .filter(
+            Budget.user_id == user_id,
+            Budget.month == today.month,
+            Budget.year == today.year
+        )
+        .order_by(Budget.budget_id)
+        .all()
+    )
+    summary.budgets = [
+        BudgetLine(
+            category_name=category_name,
+            limit=_to_decimal(monthly_limit),
+            spent=spent_by_category.get(category_id, Decimal("0"))
+        )
+        for category_id, monthly_limit, category_name in budgets
+    ]
+
+    return summary
+
+
+def summary_rows(user_id, username, today):
+    """
+    Sections 1-4 of the report (everything before the transaction history).
+
+    Returns:
+        (rows, budget_count)
+    """
+    summary = compute_report_summary(user_id, today)
+    current_month_expense = summary.current_month_expense
+    last_month_expense = summary.last_month_expense
+    current_month_income = summary.current_month_income
+
+    rows = []
+
+    # ==================== SECTION 1: SUMMARY ====================
+    rows.append(['FINANCIAL SUMMARY REPORT'])
+    rows.append(['Generated:', today.strftime('%Y-%m-%d %H:%M')])
+    rows.append(['User:', username])
+    rows.append([])
+
+    rows.append(['OVERALL FINANCIAL HEALTH'])
+    rows.append(['Current Balance', float(summary.balance)])
+    rows.append(['Current Month Income', float(current_month_income)])
+    rows.append(['Current Month Expense', float(current_month_expense)])
+    rows.append(['Last Month Expense', float(last_month_expense)])
+
+    # Month over month comparison
+    if last_month_expense > 0:
+        change_pct = ((float(current_month_expense) - float(last_month_expense)) / float(last_month_expense)) * 100
+        change_direction = "INCREASE" if change_pct > 0 else "DECREASE"
+        rows.append(['Month-over-Month Change', f'{abs(change_pct):.1f}% {change_direction}'])
+    else:
+        rows.append(['Month-over-Month Change', 'N/A (No previous data)'])
+
+    rows.append([])
+
+    # ==================== SECTION 2: BUDGET ANALYSIS ====================
+    rows.append(['BUDGET vs ACTUAL COMPARISON'])
+    rows.append(['Category', 'Budget Limit', 'Actual Spent', 'Remaining', 'Usage %', 'Status'])
+
+    for line in summary.budgets:
+        rows.append([
+            line.category_name,
+            float(line.limit),
+            float(line.spent),
+            line.remaining,
+            f'{line.percentage:.1f}%',
+            line.status
+        ])
+
+    over_budget_count = summary.over_budget_count
+    if summary.budgets:
+        total_budget = summary.total_budget
+        total_spent_against_budget = summary.total_spent_against_budget
+        rows.append([])
+        rows.append(['BUDGET SUMMARY'])
+        rows.append(['Total Budget Allocated', total_budget])
+        rows.append(['Total Spent Against Budget', total_spent_against_budget])
+        rows.append(['Categories Over Budget', over_budget_count])
+        overall_budget_usage = (total_spent_against_budget / total_budget * 100) if total_budget > 0 else 0
+        rows.append(['Overall Budget Usage', f'{overall_budget_usage:.1f}%'])
+    else:
+        rows.append(['No budgets set for current month'])
+
+    rows.append([])
+
+    # ==================== SECTION 3: CATEGORY BREAKDOWN ====================
+    rows.append(['SPENDING BY CATEGORY (Current Month)'])
+    rows.append(['Category', 'Amount', '% of Total Spending'])
+
+    for cat_name, amount in summary.category_spending:
+        pct = (float(amount) / float(current_month_expense) * 100) if current_month_expense > 0 else 0
+        rows.append([cat_name, float(amount), f'{pct:.1f}%'])
+
+    rows.append([])
+
+    # ==================== SECTION 4: ANALYSIS & INSIGHTS ====================
+    rows.append(['FINANCIAL ANALYSIS & INSIGHTS'])
+
+    # Insight 1: Spending trend
+    if last_month_expense > 0:
+        diff = float(abs(current_month_expense - last_month_expense))
+        if current_month_expense > last_month_expense:
+            rows.append(['Spending Trend', f'Your spending increased by {diff:.2f} compared to last month'])
+        else:
+            rows.append(['Spending Trend', f'Good! You saved {diff:.2f} compared to last month'])
+
+    # Insight 2: Budget health
+    if summary.budgets:
+        if over_budget_count > 0:
+            rows.append(['Budget Health', f'ATTENTION: {over_budget_count} categor{"y is" if over_budget_count == 1 else "ies are"} over budget'])
+        else:
+            rows.append(['Budget Health', 'Excellent! All categories are within budget'])
+
+    # Insight 3: Savings rate
+    if current_month_income > 0:
+        savings = float(current_month_income) - float(current_month_expense)
+        savings_rate = (savings / float(current_month_income)) * 100
+        rows.append(['Savings Rate', f'{savings_rate:.1f}% ({savings:.2f} saved this month)'])
+
+    # Insight 4: Top spending category
+    if summary.category_spending:
+        top_category, top_amount = summary.category_spending[0]
+        rows.append(['Top Spending Category', f'{top_category} ({float(top_amount):.2f})'])
+
+    rows.append([])
+    rows.append([])
+
+    return rows, len(summary.budgets)
+
+
+def history_query(user_id):
+    """Section 5 source: every transaction for a user, newest first"""
+    return (
+        db.session.query(
+            Transaction.transaction_date,
+            Transaction.transaction_type,
+            Category.category_name,
+            Transaction.amount
+        )
+        .join(Category, Transaction.category_id == Category.category_id)
+        .filter(Transaction.user_id == user_id)
+        .order_by(Transaction.transaction_date.desc())
+    )
+
+
+def history_rows(user_id, batch_size=1000, progress=None):
+    """
+    Section 5 of the report, streamed from a server-side cursor.
+
+    Args:
+        batch_size: Rows fetched per round trip
+        progress: Optional callable(rows_so_far), called once per batch
+            and once at the end
+    """
+    yield ['DETAILED TRANSACTION HISTORY']
+    yield ['Date', 'Type', 'Category', 'Amount']
+
+    count = 0
+    for txn in history_query(user_id).yield_per(batch_size):
+        yield [
+            txn.transaction_date.strftime('%Y-%m-%d'),
+            txn.transaction_type,
+            txn.category_name,
+            float(txn.amount)
+        ]
+        count += 1
+        if progress is not None and count % batch_size == 0:
+            progress(count)
+
+    if progress is not None:
+        progress(count)
+
+
+def stream_csv(rows, flush_rows=500):
+    """Encode rows as CSV, yielding text every flush_rows rows"""
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    pending = 0
+
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= flush_rows:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+            pending = 0
+
+    if pending:
+        yield buffer.getvalue()
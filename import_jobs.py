@@ -0,0 +1,438 @@
+"""
+Import Jobs - Background Bulk Uploads
+=====================================
+Runs bulk uploads outside the request cycle so a large file neither
+holds a web worker nor races the gunicorn timeout.
+
+    submit_import()       -> spool the file, create an import_jobs row, queue it
+    get_import_job()      -> the job row, for its owner
+    commit_import()       -> import the valid rows of a job that had errors
+    resubmit_import()     -> queue corrected rows as another pass of a job
+    discard_import()      -> drop a job's staged rows
+    resume_import_jobs()  -> re-queue jobs a dead process left behind
+
+Jobs run on a small thread pool (IMPORT_WORKERS) inside each web process.
+A job reads its file chunk by chunk (upload_ingest), staging valid rows
+in staged_transactions and committing each chunk together with its
+progress (rows_read / heartbeat_at). Once the file is read:
+- no errors: the staged rows are committed to transactions at once
+  (one INSERT ... SELECT, staged_imports.commit_staged)
+- errors: the job stays "staged"; the results page lets the user import
+  the valid rows anyway or upload only the corrected rows, which are
+  validated as a further pass and merged with the rows already staged.
+  A correction pass never imports by itself: the job stays staged, with
+  the pass's counts added to its totals, until the user commits it.
+
+State lives in the import_jobs table, so it survives restarts:
+- A worker only starts a job after claiming it with a conditional
+  UPDATE (queued, or running with a heartbeat older than
+  IMPORT_JOB_STALE_SECONDS), so two processes never run the same job.
+- Every process calls resume_import_jobs() on its first request (and on
+  each new upload). A re-run first clears the rows its interrupted pass
+  had staged; after IMPORT_JOB_MAX_ATTEMPTS the job is marked failed.
+- A file whose content hash matches a job that is still queued, running
+  or staged reuses that job instead of being read again. So does one
+  matching a finished job whose imported rows all still exist: the
+  upload is answered with that job's results without being parsed.
+- Otherwise rows an earlier upload imported are recognised by their row
+  hash and skipped (skipped_count), so an overlapping statement only
+  validates its new rows.
+
+Spooled files are kept until their pass finishes, on local disk
+(UPLOAD_SPOOL_DIR), so all web processes must share that directory.
+Staged jobs nobody acts on are discarded after IMPORT_STAGING_TTL.
+"""
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import and_, or_, update
+from werkzeug.utils import secure_filename
+
+from extensions import db
+from models import ImportJob
+from cache_helpers import bump_data_version
+from upload_ingest import spool_upload, ingest_upload
+from staged_imports import (
+    stage_rows, staged_count, staged_fingerprints, clear_staged, commit_staged, imported_row_count
+)
+
+# Statuses in which a job's file has not been fully read yet
+PENDING_STATUSES = ("queued", "running")
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=current_app.config.get("IMPORT_WORKERS", 2),
+                thread_name_prefix="import"
+            )
+        return _executor
+
+
+def _queue(job_id):
+    app = current_app._get_current_object()
+    _get_executor().submit(_run_import, app, job_id)
+
+
+def _stale_cutoff():
+    return datetime.utcnow() - timedelta(seconds=current_app.config.get("IMPORT_JOB_STALE_SECONDS", 300))
+
+
+def _claimable():
+    return or_(
+        ImportJob.status == "queued",
+        and_(ImportJob.status == "running", ImportJob.heartbeat_at < _stale_cutoff())
+    )
+
+
+def _transition(job_id, condition, **values):
+    """Conditional UPDATE of one job (does not commit). Returns True if it matched"""
+    result = db.session.execute(
+        update(ImportJob)
+        .where(ImportJob.job_id == job_id, condition)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def _claim(job_id):
+    """Atomically take a job for this worker. Returns True if it was claimed"""
+    now = datetime.utcnow()
+    claimed = _transition(
+        job_id, _claimable(),
+        status="running",
+        attempts=ImportJob.attempts + 1,
+        rows_read=0,
+        started_at=now,
+        heartbeat_at=now
+    )
+    db.session.commit()
+    return claimed
+
+
+def _heartbeat(job_id, rows_read):
+    """Record progress; committed with the chunk just staged"""
+    _transition(job_id, ImportJob.status == "running", rows_read=rows_read, heartbeat_at=datetime.utcnow())
+
+
+def _remove_spool(job):
+    if job.spool_path and os.path.exists(job.spool_path):
+        os.remove(job.spool_path)
+
+
+def _fail(job, message):
+    """
+    End a pass that could not be read. A correction pass falls back to
+    the rows staged before it; a first pass fails the job.
+    """
+    if job.passes > 1:
+        clear_staged(job.job_id, from_pass=job.passes)
+        job.status = "staged"
+    else:
+        clear_staged(job.job_id)
+        job.status = "failed"
+    job.error_message = message
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+    _remove_spool(job)
+
+
+def _add_correction_pass(job, result, pass_number):
+    """
+    Add a correction pass to the job's totals. Each valid row of the pass
+    counts as fixing one outstanding error row; its own errors are listed
+    after the earlier ones, tagged with the pass.
+    """
+    job.total_rows += result.total_rows
+    job.valid_count += result.valid_count
+    job.duplicate_count += result.duplicate_count
+    job.skipped_count += result.skipped_count
+    job.error_count = job.error_count - min(result.valid_count, job.error_count) + result.error_count
+
+    max_errors = current_app.config.get("UPLOAD_MAX_REPORTED_ERRORS", 1000)
+    errors = job_errors(job) + [{**error, "pass": pass_number} for error in result.errors]
+    job.errors = json.dumps(errors[:max_errors], default=str) if errors else None
+
+
+def _run_import(app, job_id):
+    with app.app_context():
+        try:
+            if not _claim(job_id):
+                return
+
+            job = db.session.get(ImportJob, job_id)
+            if job.attempts > app.config.get("IMPORT_JOB_MAX_ATTEMPTS", 3):
+                _fail(job, "Import was interrupted too many times")
+                app.logger.error(f"Import job abandoned - Job: {job_id}, Attempts: {job.attempts - 1}")
+                return
+            if not os.path.exists(job.spool_path):
+                _fail(job, "Uploaded file is no longer available. Please upload it again.")
+                return
+
+            user_id, pass_number = job.user_id, job.passes
+
+            # Rows from an interrupted run of this pass; earlier passes count as imported
+            clear_staged(job_id, from_pass=pass_number)
+            earlier = staged_fingerprints(job_id) if pass_number > 1 else set()
+            db.session.commit()
+
+            result = ingest_upload(
+                user_id, job.spool_path, job.file_ext, job.date_from, job.date_to,
+                sink=lambda valid: stage_rows(job_id, user_id, pass_number, valid),
+                existing=earlier,
+                progress=lambda rows: _heartbeat(job_id, rows)
+            )
+
+            job = db.session.get(ImportJob, job_id)
+            job.rows_read = result.total_rows
+            if pass_number == 1:
+                job.total_rows = result.total_rows
+                job.valid_count = result.valid_count
+                job.duplicate_count = result.duplicate_count
+                job.skipped_count = result.skipped_count
+                job.error_count = result.error_count
+                job.errors = json.dumps(result.errors, default=str) if result.errors else None
+            else:
+                _add_correction_pass(job, result, pass_number)
+            job.error_message = None
+            job.finished_at = datetime.utcnow()
+
+            # Only a clean upload imports by itself; corrections wait for commit_import()
+            if pass_number == 1 and result.success:
+                job.imported_count = commit_staged(job_id, user_id)
+                job.staged_count = 0
+                job.status = "done"
+            else:
+                job.staged_count = staged_count(job_id)
+                job.status = "staged"
+
+            db.session.commit()
+            _remove_spool(job)
+
+            if job.imported_count:
+                bump_data_version(user_id)
+
+            app.logger.info(f"Import job {job.status} - User: {user_id}, Job: {job_id}, Pass: {pass_number}, Rows: {result.total_rows}, Imported: {job.imported_count}, Skipped: {result.skipped_count}, Errors: {result.error_count}")
+
+        except Exception as e:
+            db.session.rollback()
+            job = db.session.get(ImportJob, job_id)
+            if job is not None:
+                _fail(job, f"Error processing file: {str(e)}")
+            app.logger.error(f"Import job failed - Job: {job_id}, Error: {str(e)}")
+
+        finally:
+            db.session.remove()
+
+
+def _previous_import(user_id, content_hash, first_day):
+    """
+    Latest finished job for the same file and month that imported every
+    row itself (skipped none) and whose transactions all still exist
+    """
+    job = (
+        ImportJob.query
+        .filter(
+            ImportJob.user_id == user_id,
+            ImportJob.content_hash == content_hash,
+            ImportJob.date_from == first_day,
+            ImportJob.status == "done",
+            ImportJob.skipped_count == 0
+        )
+        .order_by(ImportJob.finished_at.desc())
+        .first()
+    )
+    if job is None or imported_row_count(job.job_id) != job.imported_count:
+        return None
+    return job
+
+
+# =========================
+# Public API
+# =========================
+
+def submit_import(user_id, file_storage, first_day, last_day):
+    """
+    Spool an uploaded file and queue its import.
+
+    Raises:
+        upload_ingest.UploadTooLarge: the file is over UPLOAD_MAX_FILE_SIZE
+
+    Returns:
+        (ImportJob, reused) - reused is True when an identical file is
+        already queued, running or staged, or was imported and its rows
+        are all still there; that job is returned
+    """
+    resume_import_jobs()
+    purge_expired_staging()
+
+    filename = secure_filename(file_storage.filename)
+    path, content_hash = spool_upload(file_storage)
+
+    existing = (
+        ImportJob.query
+        .filter(
+            ImportJob.user_id == user_id,
+            ImportJob.content_hash == content_hash,
+            ImportJob.date_from == first_day,
+            ImportJob.status.in_(PENDING_STATUSES + ("staged",))
+        )
+        .order_by(ImportJob.created_at.desc())
+        .first()
+    )
+    if existing is None:
+        existing = _previous_import(user_id, content_hash, first_day)
+    if existing is not None:
+        os.remove(path)
+        current_app.logger.info(f"Import job reused - User: {user_id}, Job: {existing.job_id}, Status: {existing.status}")
+        return existing, True
+
+    try:
+        job = ImportJob(
+            user_id=user_id,
+            filename=filename,
+            file_ext=filename.rsplit('.', 1)[1].lower(),
+            spool_path=path,
+            content_hash=content_hash,
+            date_from=first_day,
+            date_to=last_day
+        )
+        db.session.add(job)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        os.remove(path)
+        raise
+
+    _queue(job.job_id)
+    current_app.logger.info(f"Import job queued - User: {user_id}, Job: {job.job_id}, File: {filename}")
+    return job, False
+
+
+def commit_import(job):
+    """
+    Import the staged rows of a job that had errors, skipping the rows
+    that failed. Returns the number imported, or None if the job is not
+    staged (already committed, discarded or being corrected).
+    """
+    if not _transition(job.job_id, ImportJob.status == "staged", status="done", finished_at=datetime.utcnow()):
+        db.session.rollback()
+        return None
+
+    imported = commit_staged(job.job_id, job.user_id)
+    _transition(job.job_id, ImportJob.status == "done", imported_count=imported, staged_count=0)
+    db.session.commit()
+
+    if imported:
+        bump_data_version(job.user_id)
+    current_app.logger.info(f"Import job committed - User: {job.user_id}, Job: {job.job_id}, Imported: {imported}")
+    return imported
+
+
+def resubmit_import(job, file_storage):
+    """
+    Queue a file of corrected rows as the next pass of a staged job.
+    Returns False if the job is no longer staged.
+    """
+    filename = secure_filename(file_storage.filename)
+    path, _ = spool_upload(file_storage)
+
+    queued = _transition(
+        job.job_id, ImportJob.status == "staged",
+        status="queued",
+        passes=ImportJob.passes + 1,
+        spool_path=path,
+        file_ext=filename.rsplit('.', 1)[1].lower(),
+        attempts=0,
+        rows_read=0,
+        error_message=None
+    )
+    db.session.commit()
+    if not queued:
+        os.remove(path)
+        return False
+
+    _queue(job.job_id)
+    current_app.logger.info(f"Import job corrections queued - User: {job.user_id}, Job: {job.job_id}, File: {filename}")
+    return True
+
+
+def discard_import(job):
+    """Drop a staged job's rows. Returns False if the job is not staged"""
+    if not _transition(job.job_id, ImportJob.status == "staged", status="discarded", staged_count=0):
+        db.session.rollback()
+        return False
+    clear_staged(job.job_id)
+    db.session.commit()
+    return True
+
+
+def get_import_job(job_id, user_id):
+    """Job row for its owner, or None"""
+    job = db.session.get(ImportJob, job_id)
+    if job is None or job.user_id != user_id:
+        return None
+    return job
+
+
+def recent_import_jobs(user_id, limit=5):
+    return (
+        ImportJob.query
+        .filter_by(user_id=user_id)
+        .order_by(ImportJob.created_at.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def job_errors(job):
+    return json.loads(job.errors) if job.errors else []
+
+
+def purge_expired_staging():
+    """Discard staged jobs untouched for IMPORT_STAGING_TTL seconds"""
+    cutoff = datetime.utcnow() - timedelta(seconds=current_app.config.get("IMPORT_STAGING_TTL", 3 * 86400))
+    expired = (
+        ImportJob.query
+        .filter(ImportJob.status == "staged", ImportJob.finished_at < cutoff)
+        .all()
+    )
+    for job in expired:
+        discard_import(job)
+    return len(expired)
+
+
+def resume_import_jobs():
+    """
+    Queue every job that is waiting or whose worker died (heartbeat older
+    than IMPORT_JOB_STALE_SECONDS). Workers claim atomically, so a job
+    queued by several processes still runs once.
+
+    Returns:
+        Number of jobs queued
+    """
+    job_ids = [
+        job_id for (job_id,) in
+        db.session.query(ImportJob.job_id)
+        .filter(_claimable())
+        .order_by(ImportJob.created_at)
+        .all()
+    ]
+
+    for job_id in job_ids:
+        _queue(job_id)
+
+    if job_ids:
+        current_app.logger.info(f"Import jobs resumed - Count: {len(job_ids)}")
+    return len(job_ids)
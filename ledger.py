@@ -0,0 +1,304 @@
+"""
+Ledger - Derived Aggregate Maintenance
+======================================
+Keeps the daily_rollups and user_balances tables in step with the
+transactions table.
+
+Every write path (add, edit, delete, bulk upload) calls
+record_transaction_changes() inside the same database transaction as
+the write itself, passing snapshots of the rows it added and removed.
+An edit is a removal of the old snapshot plus an addition of the new one.
+Set-based inserts pass per-bucket totals to record_grouped_additions().
+
+rebuild_rollups() recomputes rollups from scratch and is used by the
+rebuild_daily_rollups.py backfill script. compute_balances() recomputes
+balances from the transactions table for verify_balances.py.
+"""
+
+from collections import namedtuple
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import func, case, delete, insert, update
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+from models import Transaction, DailyRollup, UserBalance
+
+
+# Minimal view of a transaction row, enough to maintain aggregates
+TxnRow = namedtuple("TxnRow", "transaction_date category_id transaction_type amount")
+
+
+def snapshot(txn):
+    """Capture the aggregate-relevant fields of a Transaction"""
+    return TxnRow(
+        transaction_date=txn.transaction_date,
+        category_id=txn.category_id,
+        transaction_type=txn.transaction_type,
+        amount=txn.amount
+    )
+
+
+def _to_decimal(value):
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def _rollup_deltas(added, removed):
+    """Collapse row snapshots into {(date, category_id, type): (amount, count)}"""
+    deltas = {}
+    for sign, rows in ((1, added), (-1, removed)):
+        for row in rows:
+            key = (row.transaction_date, row.category_id, row.transaction_type)
+            amount, count = deltas.get(key, (Decimal("0"), 0))
+            deltas[key] = (amount + sign * _to_decimal(row.amount), count + sign)
+    return {key: value for key, value in deltas.items() if value != (Decimal("0"), 0)}
+
+
+def _balance_delta(added, removed):
+    """Net change to CREDIT-minus-DEBIT balance"""
+    delta = Decimal("0")
+    for sign, rows in ((1, added), (-1, removed)):
+        for row in rows:
+            amount = _to_decimal(row.amount)
+            delta += sign * (amount if row.transaction_type == "CREDIT" else -amount)
+    return delta
+
+
+def _accumulating_upsert(model, values, sum_columns):
+    """
+    Dialect-native multi-row INSERT ... ON CONFLICT DO UPDATE that adds
+    the incoming values of sum_columns to the stored ones.
+    Returns None on dialects without upsert support.
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return None
+
+    table = model.__table__
+    stmt = dialect_insert(table).values(values)
+    return stmt.on_conflict_do_update(
+        index_elements=list(table.primary_key.columns),
+        set_={name: table.c[name] + stmt.excluded[name] for name in sum_columns}
+    )
+
+
+def _apply_rollup_deltas(user_id, deltas):
+    if not deltas:
+        return
+
+    values = [
+        {
+            "user_id": user_id,
+            "rollup_date": rollup_date,
+            "category_id": category_id,
+            "transaction_type": transaction_type,
+            "total_amount": amount,
+            "txn_count": count,
+        }
+        for (rollup_date, category_id, transaction_type), (amount, count) in deltas.items()
+    ]
+
+    stmt = _accumulating_upsert(DailyRollup, values, ["total_amount", "txn_count"])
+    if stmt is not None:
+        db.session.execute(stmt)
+    else:
+        # Portable fallback: update existing keys, insert the rest
+        for row in values:
+            result = db.session.execute(
+                update(DailyRollup)
+                .where(
+                    DailyRollup.user_id == row["user_id"],
+                    DailyRollup.rollup_date == row["rollup_date"],
+                    DailyRollup.category_id == row["category_id"],
+                    DailyRollup.transaction_type == row["transaction_type"]
+                )
+                .values(
+                    total_amount=DailyRollup.total_amount + row["total_amount"],
+                    txn_count=DailyRollup.txn_count + row["txn_count"]
+                )
+            )
+            if result.rowcount == 0:
+                db.session.execute(insert(DailyRollup).values(**row))
+
+    # Drop buckets whose last transaction was removed
+    if any(count < 0 for _, count in deltas.values()):
+        db.session.execute(
+            delete(DailyRollup).where(
+                DailyRollup.user_id == user_id,
+                DailyRollup.rollup_date.in_({key[0] for key in deltas}),
+                DailyRollup.txn_count <= 0
+            )
+        )
+
+
+def _apply_balance_delta(user_id, delta):
+    if not delta:
+        return
+
+    increment = (
+        update(UserBalance)
+        .where(UserBalance.user_id == user_id)
+        .values(balance=UserBalance.balance + delta, updated_at=datetime.utcnow())
+    )
+    if db.session.execute(increment).rowcount:
+        return
+
+    # First write for this user: seed from full history, which already
+    # includes the rows flushed by this write
+    seed = compute_balances(user_id).get(user_id, Decimal("0"))
+    try:
+        with db.session.begin_nested():
+            db.session.execute(
+                insert(UserBalance).values(user_id=user_id, balance=seed, updated_at=datetime.utcnow())
+            )
+    except IntegrityError:
+        # A concurrent first write created the row; apply our delta to it
+        db.session.execute(increment)
+
+
+def record_transaction_changes(user_id, added=(), removed=()):
+    """
+    Apply transaction writes to derived aggregates.
+    Call after the rows are added to / deleted from the session and
+    before db.session.commit(), so everything lands atomically.
+
+    Args:
+        user_id: Owner of the rows
+        added: TxnRow snapshots of inserted rows (or the new side of an edit)
+        removed: TxnRow snapshots of deleted rows (or the old side of an edit)
+    """
+    _apply_rollup_deltas(user_id, _rollup_deltas(added, removed))
+    _apply_balance_delta(user_id, _balance_delta(added, removed))
+
+
+def record_grouped_additions(user_id, groups):
+    """
+    record_transaction_changes() for rows inserted set-wise (INSERT ...
+    SELECT), from per-bucket totals instead of one snapshot per row.
+
+    Args:
+        user_id: Owner of the rows
+        groups: (transaction_date, category_id, transaction_type, total_amount, txn_count) tuples
+    """
+    deltas = {}
+    balance_delta = Decimal("0")
+    for transaction_date, category_id, transaction_type, total_amount, txn_count in groups:
+        key = (transaction_date, category_id, transaction_type)
+        amount, count = deltas.get(key, (Decimal("0"), 0))
+        deltas[key] = (amount + _to_decimal(total_amount), count + txn_count)
+        balance_delta += _to_decimal(total_amount) if transaction_type == "CREDIT" else -_to_decimal(total_amount)
+
+    _apply_rollup_deltas(user_id, deltas)
+    _apply_balance_delta(user_id, balance_delta)
+
+
+def get_balance(user_id):
+    """
+    Current balance for a user: a primary-key read of user_balances.
+    Users without a balance row yet (never written since the ledger was
+    deployed and not backfilled) fall back to summing their rollups.
+    """
+    row = db.session.get(UserBalance, user_id)
+    if row is not None:
+        return row.balance
+
+    return (
+        db.session.query(
+            func.coalesce(
+                func.sum(
+                    case(
+                        (DailyRollup.transaction_type == "CREDIT", DailyRollup.total_amount),
+                        else_=-DailyRollup.total_amount
+                    )
+                ),
+                0
+            )
+        )
+        .filter(DailyRollup.user_id == user_id)
+        .scalar()
+    ) or Decimal("0")
+
+
+def compute_balances(user_id=None):
+    """
+    Recompute balances from the transactions table.
+
+    Args:
+        user_id: Only this user (default: everyone with transactions)
+
+    Returns:
+        {user_id: Decimal balance}
+    """
+    query = (
+        db.session.query(
+            Transaction.user_id,
+            func.coalesce(
+                func.sum(
+                    case(
+                        (Transaction.transaction_type == "CREDIT", Transaction.amount),
+                        else_=-Transaction.amount
+                    )
+                ),
+                0
+            )
+        )
+        .filter(Transaction.user_id.isnot(None))
+    )
+    if user_id:
+        query = query.filter(Transaction.user_id == user_id)
+
+    return {uid: _to_decimal(balance) for uid, balance in query.group_by(Transaction.user_id).all()}
+
+
+def rebuild_rollups(user_id=None):
+    """
+    Recompute daily_rollups from the transactions table.
+
+    Args:
+        user_id: Rebuild only this user's rollups (default: everyone)
+
+    Returns:
+        Number of rollup rows written
+    """
+    clear = delete(DailyRollup)
+    source = (
+        db.session.query(
+            Transaction.user_id,
+            Transaction.transaction_date,
+            Transaction.category_id,
+            Transaction.transaction_type,
+            func.sum(Transaction.amount),
+            func.count()
+        )
+        .filter(
+            Transaction.user_id.isnot(None),
+            Transaction.transaction_date.isnot(None),
+            Transaction.category_id.isnot(None),
+            Transaction.transaction_type.isnot(None)
+        )
+    )
+
+    if user_id:
+        clear = clear.where(DailyRollup.user_id == user_id)
+        source = source.filter(Transaction.user_id == user_id)
+
+    source = source.group_by(
+        Transaction.user_id,
+        Transaction.transaction_date,
+        Transaction.category_id,
+        Transaction.transaction_type
+    )
+
+    db.session.execute(clear)
+    result = db.session.execute(
+        insert(DailyRollup).from_select(
+            ["user_id", "rollup_date", "category_id", "transaction_type", "total_amount", "txn_count"],
+            source.statement
+        )
+    )
+    return result.rowcount
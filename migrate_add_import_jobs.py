@@ -0,0 +1,74 @@
+"""
+Database Migration: Add Import Jobs Table
+=========================================
+Creates the import_jobs table that tracks background bulk uploads
+(import_jobs.py). Safe to run more than once.
+"""
+
+import psycopg2
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+def migrate_add_import_jobs():
+    print("[INFO] Creating import_jobs table...")
+
+    conn = psycopg2.connect(os.getenv("DATABASE_URL"))
+    cursor = conn.cursor()
+
+    try:
+        print("  - Creating table import_jobs...")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS import_jobs (
+                job_id VARCHAR(36) PRIMARY KEY,
+                user_id VARCHAR(36) NOT NULL REFERENCES users(user_id),
+                filename VARCHAR(255) NOT NULL,
+                file_ext VARCHAR(10) NOT NULL,
+                spool_path TEXT NOT NULL,
+                date_from DATE NOT NULL,
+                date_to DATE NOT NULL,
+                status VARCHAR(20) NOT NULL DEFAULT 'queued',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                rows_read INTEGER NOT NULL DEFAULT 0,
+                total_rows INTEGER NOT NULL DEFAULT 0,
+                valid_count INTEGER NOT NULL DEFAULT 0,
+                imported_count INTEGER NOT NULL DEFAULT 0,
+                duplicate_count INTEGER NOT NULL DEFAULT 0,
+                error_count INTEGER NOT NULL DEFAULT 0,
+                errors TEXT,
+                error_message TEXT,
+                created_at TIMESTAMP DEFAULT NOW(),
+                started_at TIMESTAMP,
+                heartbeat_at TIMESTAMP,
+                finished_at TIMESTAMP
+            );
+        """)
+
+        print("  - Creating index on import_jobs(user_id)...")
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS ix_import_jobs_user_id
+            ON import_jobs(user_id);
+        """)
+
+        print("  - Creating index on import_jobs(status)...")
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS ix_import_jobs_status
+            ON import_jobs(status);
+        """)
+
+        conn.commit()
+        print("[OK] import_jobs table is ready!")
+
+    except Exception as e:
+        conn.rollback()
+        print(f"[ERROR] Migration failed: {str(e)}")
+        raise
+
+    finally:
+        cursor.close()
+        conn.close()
+        print("[INFO] Database connection closed.")
+
+if __name__ == "__main__":
+    migrate_add_import_jobs()
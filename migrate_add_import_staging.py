@@ -0,0 +1,77 @@
+"""
+Database Migration: Add Import Staging
+======================================
+Creates staged_transactions, where the valid rows of a bulk upload wait
+until they are committed (staged_imports.py), and adds the columns
+import_jobs needs for staged imports:
+- content_hash   SHA-256 of the uploaded file, to recognise re-uploads
+- passes         files read into the job (the upload plus corrections)
+- staged_count   valid rows waiting in staging
+
+Run after migrate_add_import_jobs.py. Safe to run more than once.
+"""
+
+import psycopg2
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+def migrate_add_import_staging():
+    print("[INFO] Adding import staging...")
+
+    conn = psycopg2.connect(os.getenv("DATABASE_URL"))
+    cursor = conn.cursor()
+
+    try:
+        print("  - Adding staged import columns to import_jobs...")
+        cursor.execute("""
+            ALTER TABLE import_jobs
+                ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64),
+                ADD COLUMN IF NOT EXISTS passes INTEGER NOT NULL DEFAULT 1,
+                ADD COLUMN IF NOT EXISTS staged_count INTEGER NOT NULL DEFAULT 0;
+        """)
+
+        print("  - Creating index on import_jobs(content_hash)...")
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS ix_import_jobs_content_hash
+            ON import_jobs(content_hash);
+        """)
+
+        print("  - Creating table staged_transactions...")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS staged_transactions (
+                staged_id BIGSERIAL PRIMARY KEY,
+                job_id VARCHAR(36) NOT NULL REFERENCES import_jobs(job_id) ON DELETE CASCADE,
+                pass_number INTEGER NOT NULL,
+                row_number INTEGER NOT NULL,
+                transaction_id VARCHAR(36) NOT NULL,
+                user_id VARCHAR(36) NOT NULL REFERENCES users(user_id),
+                transaction_type VARCHAR(10) NOT NULL,
+                amount NUMERIC(12, 2) NOT NULL,
+                category_id INTEGER NOT NULL REFERENCES categories(category_id),
+                transaction_date DATE NOT NULL
+            );
+        """)
+
+        print("  - Creating index on staged_transactions(job_id)...")
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS ix_staged_transactions_job_id
+            ON staged_transactions(job_id);
+        """)
+
+        conn.commit()
+        print("[OK] Import staging is ready!")
+
+    except Exception as e:
+        conn.rollback()
+        print(f"[ERROR] Migration failed: {str(e)}")
+        raise
+
+    finally:
+        cursor.close()
+        conn.close()
+        print("[INFO] Database connection closed.")
+
+if __name__ == "__main__":
+    migrate_add_import_staging()
@@ -0,0 +1,43 @@
+"""
+Database Migration: Add Keyset Pagination Index
+===============================================
+The transaction history page pages with a (transaction_date,
+transaction_id) cursor instead of OFFSET. This composite index lets
+PostgreSQL seek straight to the cursor position for a user, so every
+page costs the same no matter how deep it is.
+"""
+
+import psycopg2
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+def migrate_add_keyset_index():
+    print("[INFO] Adding keyset pagination index to transactions table...")
+
+    conn = psycopg2.connect(os.getenv("DATABASE_URL"))
+    cursor = conn.cursor()
+
+    try:
+        print("  - Creating index on transactions(user_id, transaction_date DESC, transaction_id DESC)...")
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_transactions_user_date_id
+            ON transactions(user_id, transaction_date DESC, transaction_id DESC);
+        """)
+
+        conn.commit()
+        print("[OK] Keyset pagination index created successfully!")
+
+    except Exception as e:
+        conn.rollback()
+        print(f"[ERROR] Migration failed: {str(e)}")
+        raise
+
+    finally:
+        cursor.close()
+        conn.close()
+        print("[INFO] Database connection closed.")
+
+if __name__ == "__main__":
+    migrate_add_keyset_index()
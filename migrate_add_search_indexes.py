@@ -0,0 +1,61 @@
+"""
+Database Migration: Add Text Search Indexes
+===========================================
+Transaction search matches substrings of descriptions and category
+names (ILIKE '%term%'), which a B-tree index cannot serve. This enables
+pg_trgm and adds:
+- trigram GIN indexes on transactions(description) and
+  categories(category_name) for substring matching and similarity()
+- a GIN index on to_tsvector('simple', description) for word-prefix
+  matching; the expression must match transaction_search.py exactly
+"""
+
+import psycopg2
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+def migrate_add_search_indexes():
+    print("[INFO] Adding text search indexes...")
+
+    conn = psycopg2.connect(os.getenv("DATABASE_URL"))
+    cursor = conn.cursor()
+
+    try:
+        print("  - Enabling pg_trgm extension...")
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+
+        print("  - Creating trigram index on transactions(description)...")
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_transactions_description_trgm
+            ON transactions USING GIN (description gin_trgm_ops);
+        """)
+
+        print("  - Creating trigram index on categories(category_name)...")
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_categories_name_trgm
+            ON categories USING GIN (category_name gin_trgm_ops);
+        """)
+
+        print("  - Creating full-text index on transactions(description)...")
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_transactions_description_fts
+            ON transactions USING GIN (to_tsvector('simple'::regconfig, COALESCE(description, '')));
+        """)
+
+        conn.commit()
+        print("[OK] Text search indexes created successfully!")
+
+    except Exception as e:
+        conn.rollback()
+        print(f"[ERROR] Migration failed: {str(e)}")
+        raise
+
+    finally:
+        cursor.close()
+        conn.close()
+        print("[INFO] Database connection closed.")
+
+if __name__ == "__main__":
+    migrate_add_search_indexes()
@@ -0,0 +1,77 @@
+"""
+Database Migration: Add Upload Fingerprints
+===========================================
+Creates upload_row_hashes, the row hash each imported upload row came
+from (upload_validation.row_hashes), and adds the columns that record a
+processed upload's outcome:
+- import_jobs.skipped_count    rows an earlier upload already imported
+- staged_transactions.row_hash row hash carried from staging to commit
+
+Run after migrate_add_import_staging.py. Safe to run more than once.
+Uploads imported before this migration have no row hashes; their rows
+are still caught by duplicate detection.
+"""
+
+import psycopg2
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+def migrate_add_upload_fingerprints():
+    print("[INFO] Adding upload fingerprints...")
+
+    conn = psycopg2.connect(os.getenv("DATABASE_URL"))
+    cursor = conn.cursor()
+
+    try:
+        print("  - Adding import_jobs.skipped_count...")
+        cursor.execute("""
+            ALTER TABLE import_jobs
+                ADD COLUMN IF NOT EXISTS skipped_count INTEGER NOT NULL DEFAULT 0;
+        """)
+
+        print("  - Adding staged_transactions.row_hash...")
+        cursor.execute("""
+            ALTER TABLE staged_transactions
+                ADD COLUMN IF NOT EXISTS row_hash VARCHAR(64);
+        """)
+
+        print("  - Creating table upload_row_hashes...")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS upload_row_hashes (
+                transaction_id VARCHAR(36) PRIMARY KEY REFERENCES transactions(transaction_id) ON DELETE CASCADE,
+                user_id VARCHAR(36) NOT NULL REFERENCES users(user_id),
+                row_hash VARCHAR(64) NOT NULL,
+                transaction_date DATE NOT NULL,
+                job_id VARCHAR(36) NOT NULL
+            );
+        """)
+
+        print("  - Creating index on upload_row_hashes(user_id, transaction_date)...")
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS ix_upload_row_hashes_user_date
+            ON upload_row_hashes(user_id, transaction_date);
+        """)
+
+        print("  - Creating index on upload_row_hashes(job_id)...")
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS ix_upload_row_hashes_job_id
+            ON upload_row_hashes(job_id);
+        """)
+
+        conn.commit()
+        print("[OK] Upload fingerprints are ready!")
+
+    except Exception as e:
+        conn.rollback()
+        print(f"[ERROR] Migration failed: {str(e)}")
+        raise
+
+    finally:
+        cursor.close()
+        conn.close()
+        print("[INFO] Database connection closed.")
+
+if __name__ == "__main__":
+    migrate_add_upload_fingerprints()
@@ -137,6 +137,32 @@ class Transaction(db.Model):
     category = db.relationship('Category', backref='transactions')
 
 
+class DailyRollup(db.Model):
+    """
+    Per-user daily totals, maintained incrementally by ledger.py on every
+    transaction write. Aggregate reads scale with days in range rather
+    than with the number of transactions.
+    """
+    __tablename__ = "daily_rollups"
+    user_id = db.Column(db.String(36), db.ForeignKey("users.user_id"), primary_key=True)
+    rollup_date = db.Column(db.Date, primary_key=True)
+    category_id = db.Column(db.Integer, db.ForeignKey("categories.category_id"), primary_key=True)
+    transaction_type = db.Column(db.String(10), primary_key=True)
+    total_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    txn_count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class UserBalance(db.Model):
+    """
+    Running balance per user (sum of CREDIT minus DEBIT), maintained by
+    ledger.py in the same database transaction as every transaction write.
+    """
+    __tablename__ = "user_balances"
+    user_id = db.Column(db.String(36), db.ForeignKey("users.user_id"), primary_key=True)
+    balance = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 class Budget(db.Model):
     __tablename__ = "budgets"
     budget_id = db.Column(db.Integer, primary_key=True)
@@ -152,4 +178,79 @@ class Budget(db.Model):
 
     __table_args__ = (
         db.UniqueConstraint('user_id', 'category_id', 'month', 'year', name='unique_budget'),
-    )
\ No newline at end of file
+    )
+
+class ImportJob(db.Model):
+    """
+    A bulk upload processed in the background by import_jobs.py. The row
+    outlives the web process, so a queued or interrupted job is picked up
+    again after a restart.
+    """
+    __tablename__ = "import_jobs"
+    job_id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = db.Column(db.String(36), db.ForeignKey("users.user_id"), nullable=False, index=True)
+    filename = db.Column(db.String(255), nullable=False)
+    file_ext = db.Column(db.String(10), nullable=False)
+    spool_path = db.Column(db.Text, nullable=False)
+    content_hash = db.Column(db.String(64), nullable=True, index=True)  # SHA-256 of the uploaded bytes
+    date_from = db.Column(db.Date, nullable=False)  # Allowed transaction date range
+    date_to = db.Column(db.Date, nullable=False)
+
+    # queued, running, staged (errors found, valid rows waiting), done, failed, discarded
+    status = db.Column(db.String(20), nullable=False, default="queued", index=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    passes = db.Column(db.Integer, nullable=False, default=1)  # Files ingested: the upload plus corrections
+    staged_count = db.Column(db.Integer, nullable=False, default=0)
+    rows_read = db.Column(db.Integer, nullable=False, default=0)
+    total_rows = db.Column(db.Integer, nullable=False, default=0)
+    valid_count = db.Column(db.Integer, nullable=False, default=0)
+    imported_count = db.Column(db.Integer, nullable=False, default=0)
+    duplicate_count = db.Column(db.Integer, nullable=False, default=0)
+    skipped_count = db.Column(db.Integer, nullable=False, default=0)  # Rows an earlier upload already imported
+    error_count = db.Column(db.Integer, nullable=False, default=0)
+    errors = db.Column(db.Text, nullable=True)  # JSON list of reported error rows
+    error_message = db.Column(db.Text, nullable=True)  # Why a failed job failed
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+
+class StagedTransaction(db.Model):
+    """
+    A validated upload row waiting in staging until its import job is
+    committed (staged_imports.py). transaction_id is assigned here so the
+    commit is a plain INSERT ... SELECT.
+    """
+    __tablename__ = "staged_transactions"
+    staged_id = db.Column(db.BigInteger().with_variant(db.Integer, "sqlite"), primary_key=True, autoincrement=True)
+    job_id = db.Column(db.String(36), db.ForeignKey("import_jobs.job_id", ondelete="CASCADE"), nullable=False, index=True)
+    pass_number = db.Column(db.Integer, nullable=False)  # ImportJob.passes when the row was staged
+    row_number = db.Column(db.Integer, nullable=False)  # Spreadsheet row in its file
+    transaction_id = db.Column(db.String(36), nullable=False)
+    user_id = db.Column(db.String(36), db.ForeignKey("users.user_id"), nullable=False)
+    transaction_type = db.Column(db.String(10), nullable=False)
+    amount = db.Column(db.Numeric(12, 2), nullable=False)
+    category_id = db.Column(db.Integer, db.ForeignKey("categories.category_id"), nullable=False)
+    transaction_date = db.Column(db.Date, nullable=False)
+    row_hash = db.Column(db.String(64), nullable=True)  # upload_validation.row_hashes()
+
+
+class UploadRowHash(db.Model):
+    """
+    Fingerprint of the upload row each imported transaction came from
+    (upload_validation.row_hashes), written when staged rows are
+    committed. A later upload skips rows whose fingerprint is still
+    attached to a transaction, before validating them.
+    """
+    __tablename__ = "upload_row_hashes"
+    transaction_id = db.Column(db.String(36), db.ForeignKey("transactions.transaction_id", ondelete="CASCADE"), primary_key=True)
+    user_id = db.Column(db.String(36), db.ForeignKey("users.user_id"), nullable=False)
+    row_hash = db.Column(db.String(64), nullable=False)
+    transaction_date = db.Column(db.Date, nullable=False)
+    job_id = db.Column(db.String(36), nullable=False, index=True)  # Import job that imported the row
+
+    __table_args__ = (
+        db.Index('ix_upload_row_hashes_user_date', 'user_id', 'transaction_date'),
+    )
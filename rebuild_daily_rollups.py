@@ -0,0 +1,44 @@
+"""
+Daily Rollups: Create / Backfill / Rebuild
+==========================================
+Creates the daily_rollups table if it does not exist and recomputes it
+from the transactions table.
+
+Run once after deploying the rollup feature, and again at any time to
+repair drift:
+
+    python rebuild_daily_rollups.py                 # all users
+    python rebuild_daily_rollups.py --user-id <id>  # a single user
+"""
+
+import argparse
+
+from app import app
+from extensions import db
+from models import DailyRollup
+from ledger import rebuild_rollups
+
+
+def rebuild(user_id=None):
+    with app.app_context():
+        try:
+            print("[INFO] Ensuring daily_rollups table exists...")
+            DailyRollup.__table__.create(db.engine, checkfirst=True)
+
+            scope = f"user {user_id}" if user_id else "all users"
+            print(f"[INFO] Rebuilding daily rollups for {scope}...")
+            written = rebuild_rollups(user_id)
+            db.session.commit()
+
+            print(f"[OK] Daily rollups rebuilt ({written} rows written)")
+        except Exception as e:
+            db.session.rollback()
+            print(f"[ERROR] Rollup rebuild failed: {e}")
+            raise
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill or rebuild the daily_rollups table")
+    parser.add_argument("--user-id", help="Rebuild a single user's rollups")
+    args = parser.parse_args()
+    rebuild(args.user_id)
@@ -1,6 +1,9 @@
 from flask import Blueprint, render_template, request, redirect, session, current_app
 from extensions import db
-from models import Budget, Category, Transaction
+from cache_helpers import bump_data_version, conditional_on_data_version
+from db_routing import reads_from_replica
+from category_catalog import get_category_catalog
+from models import Budget, Category, DailyRollup
 from sqlalchemy import func
 from datetime import date
 
@@ -8,6 +11,8 @@ budget_bp = Blueprint("budgets", __name__)
 
 
 @budget_bp.route("/budgets")
+@conditional_on_data_version
+@reads_from_replica
 def view_budgets():
     """View all budgets for current month"""
     if "user_id" not in session:
@@ -33,24 +38,28 @@ def view_budgets():
         .all()
     )
 
-    # Calculate actual spending for each budget
+    # Actual spending per category this month, from daily rollups
+    first_day = date(current_year, current_month, 1)
+    today = date.today()
+
+    spending_by_category = dict(
+        db.session.query(
+            DailyRollup.category_id,
+            func.coalesce(func.sum(DailyRollup.total_amount), 0)
+        )
+        .filter(
+            DailyRollup.user_id == user_id,
+            DailyRollup.transaction_type == "DEBIT",
+            DailyRollup.rollup_date >= first_day,
+            DailyRollup.rollup_date <= today
+        )
+        .group_by(DailyRollup.category_id)
+        .all()
+    )
+
     budget_data = []
     for budget, category_name, category_type in budgets:
-        # Get actual spending for this category this month
-        first_day = date(current_year, current_month, 1)
-        today = date.today()
-
-        actual_spent = (
-            db.session.query(func.coalesce(func.sum(Transaction.amount), 0))
-            .filter(
-                Transaction.user_id == user_id,
-                Transaction.category_id == budget.category_id,
-                Transaction.transaction_type == "DEBIT",
-                Transaction.transaction_date >= first_day,
-                Transaction.transaction_date <= today
-            )
-            .scalar()
-        ) or 0
+        actual_spent = spending_by_category.get(budget.category_id, 0)
 
         percentage = (float(actual_spent) / float(budget.monthly_limit) * 100) if budget.monthly_limit > 0 else 0
 
@@ -66,15 +75,11 @@ def view_budgets():
         })
 
     # Get categories that don't have budgets yet
-    existing_category_ids = [b.category_id for b, _, _ in budgets]
-    available_categories = (
-        Category.query
-        .filter(
-            Category.category_type == "DEBIT",
-            ~Category.category_id.in_(existing_category_ids) if existing_category_ids else True
-        )
-        .all()
-    )
+    existing_category_ids = {b.category_id for b, _, _ in budgets}
+    available_categories = [
+        category for category in get_category_catalog(user_id).by_type("DEBIT")
+        if category.category_id not in existing_category_ids
+    ]
 
     return render_template(
         "budgets.html",
@@ -126,6 +131,7 @@ def add_budget():
 
         db.session.add(new_budget)
         db.session.commit()
+        bump_data_version(user_id)
 
         current_app.logger.info(f"Budget added - User: {session.get('username')}, Category: {category_id}, Limit: {monthly_limit}")
 
@@ -154,6 +160,7 @@ def update_budget(budget_id):
         if new_limit:
             budget.monthly_limit = float(new_limit)
             db.session.commit()
+            bump_data_version(user_id)
 
             current_app.logger.info(f"Budget updated - User: {session.get('username')}, Budget ID: {budget_id}, New Limit: {new_limit}")
 
@@ -180,6 +187,7 @@ def delete_budget(budget_id):
 
         db.session.delete(budget)
         db.session.commit()
+        bump_data_version(user_id)
 
         current_app.logger.info(f"Budget deleted - User: {session.get('username')}, Budget ID: {budget_id}")
 
@@ -1,19 +1,18 @@
 from flask import Blueprint, render_template, request, redirect, session, current_app, send_file, flash
+from upload_templates import TEMPLATE_FORMATS, get_upload_template
 from extensions import db
-from models import Transaction, Category
-from datetime import datetime, date, timedelta
-from werkzeug.utils import secure_filename
-import pandas as pd
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment
+from upload_ingest import UploadTooLarge
+from import_jobs import (
+    submit_import, get_import_job, recent_import_jobs, job_errors, resume_import_jobs,
+    commit_import, resubmit_import, discard_import
+)
+from datetime import date, timedelta
 from io import BytesIO
-import os
 
 bulk_upload_bp = Blueprint("bulk_upload", __name__)
 
 # Configuration
 ALLOWED_EXTENSIONS = {'xlsx', 'xls', 'csv'}
-MAX_FILE_SIZE = 10 * 1024 * 1024  # 10 MB
 
 
 def allowed_file(filename):
@@ -37,145 +36,36 @@ def bulk_upload():
         return redirect("/")
 
     first_day, last_day = get_previous_month_range()
+    import_jobs = [_job_status(job) for job in recent_import_jobs(session["user_id"])]
 
     return render_template(
         "bulk_upload.html",
         previous_month=first_day.strftime("%B %Y"),
         date_range=f"{first_day.strftime('%Y-%m-%d')} to {last_day.strftime('%Y-%m-%d')}",
+        import_jobs=import_jobs,
+        max_file_size_mb=current_app.config.get("UPLOAD_MAX_FILE_SIZE", 0) // (1024 * 1024),
         active_user=session.get("username", "Guest")
     )
 
 
 @bulk_upload_bp.route("/download-template/<file_type>")
 def download_template(file_type):
-    """Generate and download Excel or CSV template"""
+    """Download the Excel or CSV template (cached per category version and month)"""
     if "user_id" not in session:
         return redirect("/")
 
-    user_id = session["user_id"]
-
-    # Get user's categories for reference
-    categories = Category.query.filter(
-        db.or_(Category.user_id == None, Category.user_id == user_id)
-    ).order_by(Category.category_type, Category.category_name).all()
+    if file_type not in TEMPLATE_FORMATS:
+        return "Unknown template format", 404
 
-    # Get previous month date range
     first_day, last_day = get_previous_month_range()
+    content, filename, mimetype = get_upload_template(session["user_id"], file_type, first_day, last_day)
 
-    # Create DataFrame with template structure
-    template_data = {
-        'Transaction Date (YYYY-MM-DD)': [
-            first_day.strftime('%Y-%m-%d'),
-            '',  # Empty row for user to fill
-        ],
-        'Transaction Type (CREDIT/DEBIT)': [
-            'DEBIT',
-            '',
-        ],
-        'Amount': [
-            '1000.00',
-            '',
-        ],
-        'Category Name': [
-            categories[0].category_name if categories else 'Food',
-            '',
-        ]
-    }
-
-    df = pd.DataFrame(template_data)
-
-    if file_type == 'excel':
-        # Create Excel file with formatting
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Transactions')
-
-            # Get the workbook and worksheet
-            workbook = writer.book
-            worksheet = writer.sheets['Transactions']
-
-            # Style header row
-            header_fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
-            header_font = Font(color='FFFFFF', bold=True)
-
-            for cell in worksheet[1]:
-                cell.fill = header_fill
-                cell.font = header_font
-                cell.alignment = Alignment(horizontal='center', vertical='center')
-
-            # Auto-adjust column widths
-            for column in worksheet.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(cell.value)
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                worksheet.column_dimensions[column_letter].width = adjusted_width
-
-            # Add instructions sheet
-            instructions_data = {
-                'Instructions': [
-                    'HOW TO USE THIS TEMPLATE:',
-                    '',
-                    '1. Fill in your transaction data in the "Transactions" sheet',
-                    '2. Transaction Date must be in YYYY-MM-DD format (e.g., 2024-01-15)',
-                    f'3. Date must be between {first_day.strftime("%Y-%m-%d")} and {last_day.strftime("%Y-%m-%d")}',
-                    '4. Transaction Type must be either CREDIT or DEBIT',
-                    '5. Amount must be a positive number (e.g., 1000.00)',
-                    '6. Category Name must match one of your existing categories',
-                    '',
-                    'AVAILABLE CATEGORIES:',
-                ] + [f'  - {cat.category_name} ({cat.category_type})' for cat in categories[:20]]
-            }
-
-            instructions_df = pd.DataFrame(instructions_data)
-            instructions_df.to_excel(writer, index=False, sheet_name='Instructions')
-
-        output.seek(0)
-
-        filename = f'transaction_template_{first_day.strftime("%Y_%m")}.xlsx'
-
-        return send_file(
-            output,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            as_attachment=True,
-            download_name=filename
-        )
-
-    elif file_type == 'csv':
-        # Create CSV file
-        output = BytesIO()
-
-        # Add instructions as comments
-        instructions = [
-            f"# Transaction Upload Template for {first_day.strftime('%B %Y')}",
-            f"# Date Range: {first_day.strftime('%Y-%m-%d')} to {last_day.strftime('%Y-%m-%d')}",
-            "# Format: Transaction Date (YYYY-MM-DD), Transaction Type (CREDIT/DEBIT), Amount, Category Name",
-            "# Example: 2024-01-15, DEBIT, 1000.00, Food",
-            f"# Available Categories: {', '.join([cat.category_name for cat in categories[:10]])}",
-            "",
-        ]
-
-        # Write instructions
-        for instruction in instructions:
-            output.write((instruction + '\n').encode('utf-8'))
-
-        # Write data
-        df.to_csv(output, index=False)
-        output.seek(0)
-
-        filename = f'transaction_template_{first_day.strftime("%Y_%m")}.csv'
-
-        return send_file(
-            output,
-            mimetype='text/csv',
-            as_attachment=True,
-            download_name=filename
-        )
+    return send_file(
+        BytesIO(content),
+        mimetype=mimetype,
+        as_attachment=True,
+        download_name=filename
+    )
 
 
 @bulk_upload_bp.route("/upload-transactions", methods=["POST"])
@@ -202,172 +92,188 @@ def upload_transactions():
         return redirect("/bulk-upload")
 
     try:
-        # Read file based on extension
-        filename = secure_filename(file.filename)
-        file_ext = filename.rsplit('.', 1)[1].lower()
-
-        if file_ext == 'csv':
-            # Read CSV, skip comment lines
-            df = pd.read_csv(file, comment='#')
-        else:
-            # Read Excel
-            df = pd.read_excel(file, sheet_name='Transactions')
-
-        # Validate and process data
+        # Stored and imported in the background; /bulk-upload shows progress
         first_day, last_day = get_previous_month_range()
+        job, reused = submit_import(user_id, file, first_day, last_day)
+
+        if reused:
+            if job.status == "staged":
+                flash("This file was already checked - here are its results.", "success")
+                return redirect(f"/import-jobs/{job.job_id}/results")
+            if job.status == "done":
+                flash(f"This file was already imported on {job.finished_at.strftime('%Y-%m-%d')} - nothing new to import.", "success")
+                return redirect(f"/import-jobs/{job.job_id}/results")
+            flash("This file is already being imported - progress is shown below.", "success")
+            return redirect("/bulk-upload")
+
+        current_app.logger.info(f"Bulk upload queued - User: {session.get('username')}, Job: {job.job_id}")
+        flash(f"{job.filename} uploaded. Importing in the background - progress is shown below.", "success")
+        return redirect("/bulk-upload")
+
+    except UploadTooLarge as e:
+        flash(f"{str(e)}. Please split it into smaller files.", "error")
+        return redirect("/bulk-upload")
+
+    except Exception as e:
+        current_app.logger.error(f"Bulk upload error - User: {session.get('username')}, Error: {str(e)}")
+        flash(f"Error processing file: {str(e)}", "error")
+        return redirect("/bulk-upload")
+
+
+# =========================
+# Import jobs
+# =========================
+
+_jobs_resumed = False
+
+
+@bulk_upload_bp.before_app_request
+def resume_interrupted_imports():
+    """Once per process: re-queue imports a previous process left unfinished"""
+    global _jobs_resumed
+    if _jobs_resumed:
+        return
+    _jobs_resumed = True
+    try:
+        resume_import_jobs()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Import job resume failed - Error: {str(e)}")
+
+
+def _job_status(job):
+    return {
+        "job_id": job.job_id,
+        "filename": job.filename,
+        "status": job.status,
+        "rows_read": job.rows_read,
+        "total_rows": job.total_rows,
+        "imported_count": job.imported_count,
+        "staged_count": job.staged_count,
+        "duplicate_count": job.duplicate_count,
+        "skipped_count": job.skipped_count,
+        "error_count": job.error_count,
+        "error": job.error_message,
+        "results_url": f"/import-jobs/{job.job_id}/results" if job.status in ("staged", "done") else None,
+    }
+
+
+@bulk_upload_bp.route("/import-jobs/<job_id>")
+def import_job_status(job_id):
+    """Poll an import job (JSON)"""
+    if "user_id" not in session:
+        return {"error": "Not logged in"}, 401
+
+    job = get_import_job(job_id, session["user_id"])
+    if job is None:
+        return {"error": "Import not found"}, 404
+
+    return _job_status(job)
+
+
+@bulk_upload_bp.route("/import-jobs/<job_id>/results")
+def import_job_results(job_id):
+    """Results page of a finished import"""
+    if "user_id" not in session:
+        return redirect("/")
 
-        validation_errors = []
-        valid_records = []
-        duplicate_count = 0
-
-        # Get user's categories for validation
-        user_categories = {
-            cat.category_name.lower(): cat
-            for cat in Category.query.filter(
-                db.or_(Category.user_id == None, Category.user_id == user_id)
-            ).all()
-        }
-
-        for index, row in df.iterrows():
-            row_num = index + 2  # +2 because index starts at 0 and header is row 1
-            errors = []
-
-            # Skip empty rows
-            if row.isna().all():
-                continue
-
-            # Validate Transaction Date
-            try:
-                if pd.isna(row['Transaction Date (YYYY-MM-DD)']):
-                    errors.append("Transaction Date is required")
-                else:
-                    txn_date_str = str(row['Transaction Date (YYYY-MM-DD)']).strip()
-                    # Handle different date formats
-                    for date_format in ['%Y-%m-%d', '%Y/%m/%d', '%d-%m-%Y', '%d/%m/%Y']:
-                        try:
-                            txn_date = datetime.strptime(txn_date_str, date_format).date()
-                            break
-                        except ValueError:
-                            continue
-                    else:
-                        errors.append("Invalid date format. Use YYYY-MM-DD (e.g., 2024-01-15)")
-                        txn_date = None
-
-                    # Validate date is in previous month
-                    if txn_date and not (first_day <= txn_date <= last_day):
-                        errors.append(f"Date must be between {first_day} and {last_day}")
-
-            except Exception as e:
-                errors.append(f"Date error: {str(e)}")
-                txn_date = None
-
-            # Validate Transaction Type
-            if pd.isna(row['Transaction Type (CREDIT/DEBIT)']):
-                errors.append("Transaction Type is required")
-                txn_type = None
-            else:
-                txn_type = str(row['Transaction Type (CREDIT/DEBIT)']).strip().upper()
-                if txn_type not in ['CREDIT', 'DEBIT']:
-                    errors.append("Transaction Type must be CREDIT or DEBIT")
-
-            # Validate Amount
-            try:
-                if pd.isna(row['Amount']):
-                    errors.append("Amount is required")
-                    amount = None
-                else:
-                    amount = float(row['Amount'])
-                    if amount <= 0:
-                        errors.append("Amount must be greater than 0")
-            except ValueError:
-                errors.append("Amount must be a valid number")
-                amount = None
-
-            # Validate Category
-            if pd.isna(row['Category Name']):
-                errors.append("Category Name is required")
-                category = None
-            else:
-                category_name = str(row['Category Name']).strip()
-                category = user_categories.get(category_name.lower())
-
-                if not category:
-                    errors.append(f"Category '{category_name}' not found. Please use an existing category.")
-
-            # Check for duplicates
-            if txn_date and amount and category and not errors:
-                duplicate = Transaction.query.filter_by(
-                    user_id=user_id,
-                    transaction_date=txn_date,
-                    amount=amount,
-                    category_id=category.category_id
-                ).first()
-
-                if duplicate:
-                    errors.append("Duplicate transaction already exists in database")
-                    duplicate_count += 1
-
-            if errors:
-                validation_errors.append({
-                    'row': row_num,
-                    'date': txn_date_str if 'txn_date_str' in locals() else str(row['Transaction Date (YYYY-MM-DD)']),
-                    'type': txn_type if txn_type else str(row['Transaction Type (CREDIT/DEBIT)']),
-                    'amount': amount if amount else str(row['Amount']),
-                    'category': category_name if 'category_name' in locals() else str(row['Category Name']),
-                    'errors': ', '.join(errors)
-                })
-            else:
-                valid_records.append({
-                    'date': txn_date,
-                    'type': txn_type,
-                    'amount': amount,
-                    'category_id': category.category_id
-                })
-
-        # If there are validation errors, show them
-        if validation_errors:
-            return render_template(
-                "upload_results.html",
-                success=False,
-                total_rows=len(df),
-                valid_count=len(valid_records),
-                error_count=len(validation_errors),
-                duplicate_count=duplicate_count,
-                errors=validation_errors,
-                active_user=session.get("username", "Guest")
-            )
-
-        # Import valid records
-        imported_count = 0
-        for record in valid_records:
-            transaction = Transaction(
-                user_id=user_id,
-                transaction_type=record['type'],
-                amount=record['amount'],
-                category_id=record['category_id'],
-                transaction_date=record['date']
-            )
-            db.session.add(transaction)
-            imported_count += 1
-
-        db.session.commit()
-
-        current_app.logger.info(f"Bulk upload completed - User: {session.get('username')}, Imported: {imported_count}")
-
-        flash(f"Successfully imported {imported_count} transactions!", "success")
+    job = get_import_job(job_id, session["user_id"])
+    if job is None or job.status not in ("staged", "done"):
+        flash("That import has not finished yet.", "error")
+        return redirect("/bulk-upload")
 
+    if job.status == "staged":
         return render_template(
             "upload_results.html",
-            success=True,
-            total_rows=len(df),
-            valid_count=len(valid_records),
-            imported_count=imported_count,
-            error_count=0,
-            duplicate_count=duplicate_count,
+            success=False,
+            job=job,
+            total_rows=job.total_rows,
+            valid_count=job.staged_count,
+            error_count=job.error_count,
+            duplicate_count=job.duplicate_count,
+            skipped_count=job.skipped_count,
+            errors=job_errors(job),
             active_user=session.get("username", "Guest")
         )
 
+    return render_template(
+        "upload_results.html",
+        success=True,
+        job=job,
+        total_rows=job.total_rows,
+        valid_count=job.valid_count,
+        imported_count=job.imported_count,
+        error_count=job.error_count,
+        duplicate_count=job.duplicate_count,
+        skipped_count=job.skipped_count,
+        active_user=session.get("username", "Guest")
+    )
+
+
+@bulk_upload_bp.route("/import-jobs/<job_id>/commit", methods=["POST"])
+def import_job_commit(job_id):
+    """Import the valid staged rows of a file that had errors"""
+    if "user_id" not in session:
+        return redirect("/")
+
+    job = get_import_job(job_id, session["user_id"])
+    if job is None:
+        flash("Import not found.", "error")
+        return redirect("/bulk-upload")
+
+    try:
+        imported = commit_import(job)
     except Exception as e:
-        current_app.logger.error(f"Bulk upload error - User: {session.get('username')}, Error: {str(e)}")
-        flash(f"Error processing file: {str(e)}", "error")
+        db.session.rollback()
+        current_app.logger.error(f"Import commit error - User: {session.get('username')}, Job: {job_id}, Error: {str(e)}")
+        flash("Could not import the valid rows. Please try again.", "error")
+        return redirect(f"/import-jobs/{job_id}/results")
+
+    if imported is None:
+        flash("That import is no longer waiting for confirmation.", "error")
         return redirect("/bulk-upload")
+
+    flash(f"Successfully imported {imported} transactions!", "success")
+    return redirect(f"/import-jobs/{job_id}/results")
+
+
+@bulk_upload_bp.route("/import-jobs/<job_id>/resubmit", methods=["POST"])
+def import_job_resubmit(job_id):
+    """Validate a file of corrected rows against an import's staged rows"""
+    if "user_id" not in session:
+        return redirect("/")
+
+    job = get_import_job(job_id, session["user_id"])
+    if job is None:
+        flash("Import not found.", "error")
+        return redirect("/bulk-upload")
+
+    file = request.files.get('file')
+    if file is None or file.filename == '' or not allowed_file(file.filename):
+        flash("Please choose an Excel (.xlsx, .xls) or CSV (.csv) file with the corrected rows.", "error")
+        return redirect(f"/import-jobs/{job_id}/results")
+
+    try:
+        if not resubmit_import(job, file):
+            flash("That import is no longer waiting for corrections.", "error")
+            return redirect("/bulk-upload")
+    except UploadTooLarge as e:
+        flash(f"{str(e)}. Please split it into smaller files.", "error")
+        return redirect(f"/import-jobs/{job_id}/results")
+
+    flash("Corrections uploaded. Checking them in the background - progress is shown below.", "success")
+    return redirect("/bulk-upload")
+
+
+@bulk_upload_bp.route("/import-jobs/<job_id>/discard", methods=["POST"])
+def import_job_discard(job_id):
+    """Throw away an import's staged rows"""
+    if "user_id" not in session:
+        return redirect("/")
+
+    job = get_import_job(job_id, session["user_id"])
+    if job is None or not discard_import(job):
+        flash("That import is no longer waiting for confirmation.", "error")
+    else:
+        flash("Import discarded. Nothing was imported.", "success")
+    return redirect("/bulk-upload")
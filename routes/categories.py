@@ -1,12 +1,16 @@
 from flask import Blueprint, render_template, request, redirect, session, current_app, flash
 from extensions import db
+from cache_helpers import bump_data_version, conditional_on_data_version
+from db_routing import reads_from_replica
+from category_catalog import get_category_catalog, invalidate_category_catalog
 from models import Category
-from sqlalchemy import or_
 
 category_bp = Blueprint("categories", __name__)
 
 
 @category_bp.route("/categories")
+@conditional_on_data_version
+@reads_from_replica
 def categories():
     """Category Management - List all categories"""
     if "user_id" not in session:
@@ -14,14 +18,10 @@ def categories():
 
     user_id = session["user_id"]
 
-    # Get system categories (available to all users) and user's custom categories
-    all_categories = Category.query.filter(
-        or_(Category.user_id == None, Category.user_id == user_id)
-    ).order_by(Category.category_type, Category.category_name).all()
-
-    # Organize categories by type
-    credit_categories = [c for c in all_categories if c.category_type == "CREDIT"]
-    debit_categories = [c for c in all_categories if c.category_type == "DEBIT"]
+    # System categories (available to all users) and user's custom categories, by type
+    catalog = get_category_catalog(user_id)
+    credit_categories = catalog.by_type("CREDIT")
+    debit_categories = catalog.by_type("DEBIT")
 
     return render_template(
         "categories.html",
@@ -63,6 +63,8 @@ def add_category():
 
             db.session.add(category)
             db.session.commit()
+            invalidate_category_catalog(user_id)
+            bump_data_version(user_id)
 
             current_app.logger.info(f"Category created - Name: {category_name}, Type: {category_type}, User: {session.get('username')}")
 
@@ -78,11 +80,8 @@ def add_category():
     # GET request - show form
     user_id = session["user_id"]
 
-    # Get user's categories for parent selection
-    parent_categories = Category.query.filter(
-        or_(Category.user_id == None, Category.user_id == user_id),
-        Category.parent_category_id == None  # Only top-level categories can be parents
-    ).order_by(Category.category_type, Category.category_name).all()
+    # Get user's categories for parent selection (only top-level categories can be parents)
+    parent_categories = get_category_catalog(user_id).parent_choices()
 
     return render_template(
         "add_category.html",
@@ -120,6 +119,8 @@ def edit_category(category_id):
             category.parent_category_id = int(parent_id) if parent_id and parent_id != "" else None
 
             db.session.commit()
+            invalidate_category_catalog(user_id)
+            bump_data_version(user_id)
 
             current_app.logger.info(f"Category updated - ID: {category_id}, User: {session.get('username')}")
 
@@ -133,11 +134,7 @@ def edit_category(category_id):
             return redirect(f"/edit-category/{category_id}")
 
     # GET request - show form
-    parent_categories = Category.query.filter(
-        or_(Category.user_id == None, Category.user_id == user_id),
-        Category.parent_category_id == None,
-        Category.category_id != category_id  # Can't be its own parent
-    ).order_by(Category.category_type, Category.category_name).all()
+    parent_categories = get_category_catalog(user_id).parent_choices(exclude_id=category_id)  # Can't be its own parent
 
     return render_template(
         "edit_category.html",
@@ -174,6 +171,8 @@ def delete_category(category_id):
         category_name = category.category_name
         db.session.delete(category)
         db.session.commit()
+        invalidate_category_catalog(user_id)
+        bump_data_version(user_id)
 
         current_app.logger.info(f"Category deleted - ID: {category_id}, Name: {category_name}, User: {session.get('username')}")
 
@@ -0,0 +1,90 @@
+from flask import Blueprint, request, session, current_app, send_file
+from export_jobs import EXPORT_FORMATS, submit_export, get_export_job, claim_artifact, report_download_name
+import os
+
+export_bp = Blueprint("exports", __name__)
+
+
+def _job_status(job):
+    """Client-facing view of a job"""
+    expected = job.get("expected_rows") or 0
+    percent = 100 if job["status"] in ("done", "downloaded") else (
+        min(99, int(job["rows"] * 100 / expected)) if expected else 0
+    )
+    status = {
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "format": job["format"],
+        "rows": job["rows"],
+        "expected_rows": expected,
+        "percent": percent,
+        "status_url": f"/exports/{job['job_id']}",
+    }
+    if job["status"] == "done":
+        status["download_url"] = f"/exports/{job['job_id']}/download"
+    if job.get("error"):
+        status["error"] = job["error"]
+    return status
+
+
+@export_bp.route("/exports", methods=["POST"])
+def create_export():
+    """Queue a background report export (format: csv or xlsx)"""
+    if "user_id" not in session:
+        return {"error": "Not authenticated"}, 401
+
+    payload = request.get_json(silent=True) or request.form
+    export_format = (payload.get("format") or "csv").lower()
+    if export_format not in EXPORT_FORMATS:
+        return {"error": f"Unsupported export format '{export_format}'"}, 400
+
+    try:
+        job = submit_export(session["user_id"], session.get("username", "user"), export_format)
+    except Exception as e:
+        current_app.logger.error(f"Export job submit error - User: {session.get('username', 'Unknown')}, Error: {str(e)}")
+        return {"error": "Could not start export"}, 500
+
+    return _job_status(job), 202
+
+
+@export_bp.route("/exports/<job_id>")
+def export_status(job_id):
+    """Progress of an export job"""
+    if "user_id" not in session:
+        return {"error": "Not authenticated"}, 401
+
+    job = get_export_job(job_id, session["user_id"])
+    if job is None:
+        return {"error": "Export not found"}, 404
+
+    return _job_status(job), {"Cache-Control": "no-store"}
+
+
+@export_bp.route("/exports/<job_id>/download")
+def download_export(job_id):
+    """One-time download of a finished export"""
+    if "user_id" not in session:
+        return {"error": "Not authenticated"}, 401
+
+    job = get_export_job(job_id, session["user_id"])
+    if job is None:
+        return {"error": "Export not found"}, 404
+    if job["status"] in ("queued", "running"):
+        return {"error": "Export is not finished yet", **_job_status(job)}, 409
+    if job["status"] == "failed":
+        return {"error": job.get("error", "Export failed")}, 500
+
+    path = claim_artifact(job) if job["status"] == "done" else None
+    if path is None:
+        return {"error": "Export has already been downloaded or has expired"}, 410
+
+    # The open handle keeps the data readable after the file is unlinked
+    artifact = open(path, "rb")
+    os.remove(path)
+
+    return send_file(
+        artifact,
+        mimetype=EXPORT_FORMATS[job["format"]],
+        as_attachment=True,
+        download_name=report_download_name(job)
+    )
@@ -1,10 +1,17 @@
-from flask import Blueprint, render_template, request, redirect, session, current_app, Response, flash
+from flask import Blueprint, render_template, request, redirect, session, current_app, Response, flash, stream_with_context
 from extensions import db
-from models import Transaction, Category, Budget
-from datetime import date, timedelta, datetime
-from sqlalchemy import func, case, or_
-from io import StringIO
-import csv
+from cache_helpers import bump_data_version, conditional_on_data_version
+from db_routing import reads_from_replica
+from category_catalog import get_category_catalog, invalidate_category_catalog
+from transaction_queries import TransactionFilters, build_history_query, fetch_keyset_page, count_results
+from transaction_search import search_transactions
+from transaction_batch import apply_transaction_batch
+from models import Transaction, Category
+from ledger import record_transaction_changes, snapshot
+from financial_report import summary_rows, history_rows, stream_csv, report_filename
+from columnar_export import COLUMNAR_FORMATS, columnar_available, stream_columnar, columnar_filename
+from datetime import date, datetime
+from itertools import chain
 
 txn_bp = Blueprint("transactions", __name__)
 
@@ -19,10 +26,7 @@ def add_transaction():
     txn_type = request.args.get("type", "DEBIT")
 
     # Load categories based on type (system + user's custom categories)
-    categories = Category.query.filter(
-        (Category.category_type == txn_type) &
-        ((Category.user_id == None) | (Category.user_id == user_id))
-    ).order_by(Category.category_name).all()
+    categories = get_category_catalog(user_id).by_type(txn_type)
 
     if request.method == "POST":
         try:
@@ -57,7 +61,9 @@ def add_transaction():
             )
 
             db.session.add(txn)
+            record_transaction_changes(user_id, added=[snapshot(txn)])
             db.session.commit()
+            bump_data_version(user_id)
 
             current_app.logger.info(f"Transaction added - User: {username}, Type: {transaction_type}, Amount: {amount}, Category ID: {category_id}, Date: {txn_date}")
 
@@ -104,13 +110,7 @@ def quick_add_category():
             return {"error": "Invalid category type"}, 400
 
         # Check for duplicate (case-insensitive)
-        existing = Category.query.filter(
-            func.lower(Category.category_name) == category_name.lower(),
-            Category.category_type == category_type,
-            ((Category.user_id == user_id) | (Category.user_id == None))
-        ).first()
-
-        if existing:
+        if category_name.lower() in get_category_catalog(user_id).name_map(category_type):
             return {"error": f"Category '{category_name}' already exists for {category_type} transactions"}, 409
 
         # Create new category
@@ -122,6 +122,8 @@ def quick_add_category():
 
         db.session.add(new_category)
         db.session.commit()
+        invalidate_category_catalog(user_id)
+        bump_data_version(user_id)
 
         current_app.logger.info(f"Quick category created - User: {session.get('username')}, Category: {category_name}, Type: {category_type}")
 
@@ -139,6 +141,8 @@ def quick_add_category():
 
 
 @txn_bp.route("/transactions")
+@conditional_on_data_version
+@reads_from_replica
 def transactions():
     """Transaction History with Search, Filter, and Pagination"""
     if "user_id" not in session:
@@ -147,76 +151,110 @@ def transactions():
     user_id = session["user_id"]
 
     # Get filter parameters
-    search = request.args.get("search", "").strip()
-    filter_type = request.args.get("type", "")
-    filter_category = request.args.get("category", "")
-    from_date_str = request.args.get("from_date", "")
-    to_date_str = request.args.get("to_date", "")
-    page = request.args.get("page", 1, type=int)
-    per_page = 20
-
-    # Build query
-    query = db.session.query(
-        Transaction.transaction_id,
-        Transaction.transaction_date,
-        Transaction.transaction_type,
-        Transaction.amount,
-        Category.category_name,
-        Category.category_id
-    ).join(Category, Transaction.category_id == Category.category_id).filter(
-        Transaction.user_id == user_id
-    )
-
-    # Apply filters
-    if filter_type:
-        query = query.filter(Transaction.transaction_type == filter_type)
-
-    if filter_category:
-        query = query.filter(Transaction.category_id == int(filter_category))
-
-    if from_date_str:
-        from_date = datetime.strptime(from_date_str, "%Y-%m-%d").date()
-        query = query.filter(Transaction.transaction_date >= from_date)
-
-    if to_date_str:
-        to_date = datetime.strptime(to_date_str, "%Y-%m-%d").date()
-        query = query.filter(Transaction.transaction_date <= to_date)
-
-    # Search by amount (if numeric) or category name
-    if search:
-        try:
-            search_amount = float(search)
-            query = query.filter(Transaction.amount == search_amount)
-        except ValueError:
-            query = query.filter(Category.category_name.ilike(f"%{search}%"))
+    filters = TransactionFilters.from_args(request.args)
 
-    # Order by date descending
-    query = query.order_by(Transaction.transaction_date.desc())
+    # Keyset pagination: the cursor marks where the previous page ended
+    query = build_history_query(user_id, filters)
+    page = fetch_keyset_page(query, request.args.get("cursor"))
+    transactions_list = page.items
 
-    # Paginate
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
-    transactions_list = pagination.items
+    # Total matches, via the configured count strategy (cached)
+    result_count = count_results(user_id, query, filters)
 
     # Get categories for filter dropdown - filter by type if selected
-    if filter_type:
-        all_categories = Category.query.filter_by(category_type=filter_type).all()
+    catalog = get_category_catalog(user_id)
+    if filters.txn_type:
+        all_categories = catalog.by_type(filters.txn_type)
     else:
-        all_categories = Category.query.all()
+        all_categories = catalog.categories
 
     return render_template(
         "transactions.html",
         transactions=transactions_list,
-        pagination=pagination,
+        page=page,
+        result_count=result_count,
+        filter_query=filters.query_string(),
         all_categories=all_categories,
-        search=search,
-        filter_type=filter_type,
-        filter_category=filter_category,
-        from_date=from_date_str,
-        to_date=to_date_str,
+        search=filters.search,
+        filter_type=filters.txn_type,
+        filter_category=filters.category,
+        from_date=filters.from_date,
+        to_date=filters.to_date,
         active_user=session.get("username", "Guest")
     )
 
 
+@txn_bp.route("/api/transactions/search")
+@conditional_on_data_version
+@reads_from_replica
+def search_transactions_api():
+    """Best matches for ?q= across descriptions and category names"""
+    if "user_id" not in session:
+        return {"error": "Not authenticated"}, 401
+
+    term = request.args.get("q", "").strip()
+    if len(term) < 2:
+        return {"query": term, "results": []}
+
+    limit = min(request.args.get("limit", 20, type=int) or 20, 100)
+    rows = search_transactions(session["user_id"], term, limit)
+
+    return {
+        "query": term,
+        "results": [
+            {
+                "transaction_id": row.transaction_id,
+                "transaction_date": row.transaction_date.isoformat(),
+                "transaction_type": row.transaction_type,
+                "amount": float(row.amount),
+                "category_name": row.category_name,
+                "description": row.description or "",
+                "rank": round(float(row.rank or 0), 4)
+            }
+            for row in rows
+        ]
+    }
+
+
+@txn_bp.route("/api/transactions/batch", methods=["POST"])
+def transaction_batch_api():
+    """Create, update and delete many transactions in one request and one DB transaction"""
+    if "user_id" not in session:
+        return {"error": "Not authenticated"}, 401
+
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or not isinstance(payload.get("operations"), list):
+        return {"error": "Expected a JSON object with an 'operations' list"}, 400
+
+    operations = payload["operations"]
+    max_operations = current_app.config.get("TRANSACTION_BATCH_MAX_OPERATIONS", 500)
+    if not operations:
+        return {"error": "No operations supplied"}, 400
+    if len(operations) > max_operations:
+        return {"error": f"Too many operations (max {max_operations} per batch)"}, 413
+
+    user_id = session["user_id"]
+    atomic = payload.get("atomic", True) is not False
+
+    try:
+        result = apply_transaction_batch(user_id, operations, atomic=atomic)
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Transaction batch error - User: {session.get('username', 'Unknown')}, Operations: {len(operations)}, Error: {str(e)}")
+        return {"error": "Batch could not be applied; no changes were made"}, 500
+
+    if result.applied:
+        bump_data_version(user_id)
+        summary = result.summary()
+        current_app.logger.info(
+            f"Transaction batch applied - User: {session.get('username')}, Created: {summary['created']}, "
+            f"Updated: {summary['updated']}, Deleted: {summary['deleted']}, Rejected: {summary['errors']}"
+        )
+        return result.to_dict()
+
+    return result.to_dict(), 422
+
+
 @txn_bp.route("/edit-transaction/<transaction_id>", methods=["GET", "POST"])
 def edit_transaction(transaction_id):
     """Edit existing transaction"""
@@ -233,6 +271,7 @@ def edit_transaction(transaction_id):
 
     if request.method == "POST":
         try:
+            previous = snapshot(transaction)
             transaction.transaction_type = request.form.get("type").upper().strip()
             transaction.amount = float(request.form.get("amount"))
             transaction.category_id = int(request.form.get("category_id"))
@@ -241,7 +280,13 @@ def edit_transaction(transaction_id):
             date_str = request.form.get("transaction_date")
             transaction.transaction_date = datetime.strptime(date_str, "%Y-%m-%d").date()
 
+            record_transaction_changes(
+                transaction.user_id,
+                added=[snapshot(transaction)],
+                removed=[previous]
+            )
             db.session.commit()
+            bump_data_version(transaction.user_id)
 
             current_app.logger.info(f"Transaction updated - ID: {transaction_id}, User: {session.get('username')}")
 
@@ -258,7 +303,7 @@ def edit_transaction(transaction_id):
     if type_param:
         transaction.transaction_type = type_param.upper()
 
-    categories = Category.query.filter_by(category_type=transaction.transaction_type).all()
+    categories = get_category_catalog(session["user_id"]).by_type(transaction.transaction_type)
 
     return render_template(
         "edit_transaction.html",
@@ -284,7 +329,9 @@ def delete_transaction(transaction_id):
             return "Transaction not found", 404
 
         db.session.delete(transaction)
+        record_transaction_changes(transaction.user_id, removed=[snapshot(transaction)])
         db.session.commit()
+        bump_data_version(transaction.user_id)
 
         current_app.logger.info(f"Transaction deleted - ID: {transaction_id}, User: {session.get('username')}")
 
@@ -297,262 +344,76 @@ def delete_transaction(transaction_id):
 
 
 @txn_bp.route("/export-transactions")
+@reads_from_replica
 def export_transactions():
     """Export comprehensive financial report with transactions, budgets, and analysis"""
     if "user_id" not in session:
         return redirect("/")
 
-    try:
-        user_id = session["user_id"]
-        username = session.get("username", "user")
-
-        # Date calculations
-        today = date.today()
-        first_day_current_month = today.replace(day=1)
-        first_day_last_month = (first_day_current_month - timedelta(days=1)).replace(day=1)
-        last_day_last_month = first_day_current_month - timedelta(days=1)
-
-        # Create CSV in memory
-        output = StringIO()
-        writer = csv.writer(output)
-
-        # ==================== SECTION 1: SUMMARY ====================
-        writer.writerow(['FINANCIAL SUMMARY REPORT'])
-        writer.writerow(['Generated:', today.strftime('%Y-%m-%d %H:%M')])
-        writer.writerow(['User:', username])
-        writer.writerow([])
-
-        # Calculate overall balance
-        balance = (
-            db.session.query(
-                func.coalesce(
-                    func.sum(
-                        case(
-                            (Transaction.transaction_type == "CREDIT", Transaction.amount),
-                            else_=-Transaction.amount
-                        )
-                    ),
-                    0
-                )
-            )
-            .filter(Transaction.user_id == user_id)
-            .scalar()
-        ) or 0
-
-        # Current month expense
-        current_month_expense = (
-            db.session.query(func.coalesce(func.sum(Transaction.amount), 0))
-            .filter(
-                Transaction.user_id == user_id,
-                Transaction.transaction_type == "DEBIT",
-                Transaction.transaction_date >= first_day_current_month,
-                Transaction.transaction_date <= today
-            )
-            .scalar()
-        ) or 0
-
-        # Last month expense
-        last_month_expense = (
-            db.session.query(func.coalesce(func.sum(Transaction.amount), 0))
-            .filter(
-                Transaction.user_id == user_id,
-                Transaction.transaction_type == "DEBIT",
-                Transaction.transaction_date >= first_day_last_month,
-                Transaction.transaction_date <= last_day_last_month
-            )
-            .scalar()
-        ) or 0
-
-        # Current month income
-        current_month_income = (
-            db.session.query(func.coalesce(func.sum(Transaction.amount), 0))
-            .filter(
-                Transaction.user_id == user_id,
-                Transaction.transaction_type == "CREDIT",
-                Transaction.transaction_date >= first_day_current_month,
-                Transaction.transaction_date <= today
-            )
-            .scalar()
-        ) or 0
-
-        writer.writerow(['OVERALL FINANCIAL HEALTH'])
-        writer.writerow(['Current Balance', float(balance)])
-        writer.writerow(['Current Month Income', float(current_month_income)])
-        writer.writerow(['Current Month Expense', float(current_month_expense)])
-        writer.writerow(['Last Month Expense', float(last_month_expense)])
-
-        # Month over month comparison
-        if last_month_expense > 0:
-            change_pct = ((float(current_month_expense) - float(last_month_expense)) / float(last_month_expense)) * 100
-            change_direction = "INCREASE" if change_pct > 0 else "DECREASE"
-            writer.writerow(['Month-over-Month Change', f'{abs(change_pct):.1f}% {change_direction}'])
-        else:
-            writer.writerow(['Month-over-Month Change', 'N/A (No previous data)'])
-
-        writer.writerow([])
-
-        # ==================== SECTION 2: BUDGET ANALYSIS ====================
-        writer.writerow(['BUDGET vs ACTUAL COMPARISON'])
-        writer.writerow(['Category', 'Budget Limit', 'Actual Spent', 'Remaining', 'Usage %', 'Status'])
-
-        budgets = Budget.query.filter_by(
-            user_id=user_id,
-            month=today.month,
-            year=today.year
-        ).all()
-
-        total_budget = 0
-        total_spent_against_budget = 0
-        over_budget_count = 0
-
-        for budget in budgets:
-            category = Category.query.get(budget.category_id)
-
-            actual_spent = (
-                db.session.query(func.coalesce(func.sum(Transaction.amount), 0))
-                .filter(
-                    Transaction.user_id == user_id,
-                    Transaction.category_id == budget.category_id,
-                    Transaction.transaction_type == "DEBIT",
-                    Transaction.transaction_date >= first_day_current_month,
-                    Transaction.transaction_date <= today
-                )
-                .scalar()
-            ) or 0
-
-            percentage = (float(actual_spent) / float(budget.monthly_limit) * 100) if budget.monthly_limit > 0 else 0
-            remaining = float(budget.monthly_limit) - float(actual_spent)
-
-            if percentage > 100:
-                status = "OVER BUDGET"
-                over_budget_count += 1
-            elif percentage >= 80:
-                status = "WARNING"
-            else:
-                status = "ON TRACK"
-
-            total_budget += float(budget.monthly_limit)
-            total_spent_against_budget += float(actual_spent)
-
-            writer.writerow([
-                category.category_name,
-                float(budget.monthly_limit),
-                float(actual_spent),
-                remaining,
-                f'{percentage:.1f}%',
-                status
-            ])
-
-        if budgets:
-            writer.writerow([])
-            writer.writerow(['BUDGET SUMMARY'])
-            writer.writerow(['Total Budget Allocated', total_budget])
-            writer.writerow(['Total Spent Against Budget', total_spent_against_budget])
-            writer.writerow(['Categories Over Budget', over_budget_count])
-            overall_budget_usage = (total_spent_against_budget / total_budget * 100) if total_budget > 0 else 0
-            writer.writerow(['Overall Budget Usage', f'{overall_budget_usage:.1f}%'])
-        else:
-            writer.writerow(['No budgets set for current month'])
-
-        writer.writerow([])
-
-        # ==================== SECTION 3: CATEGORY BREAKDOWN ====================
-        writer.writerow(['SPENDING BY CATEGORY (Current Month)'])
-        writer.writerow(['Category', 'Amount', '% of Total Spending'])
-
-        category_spending = (
-            db.session.query(
-                Category.category_name,
-                func.coalesce(func.sum(Transaction.amount), 0)
-            )
-            .join(Transaction, Transaction.category_id == Category.category_id)
-            .filter(
-                Transaction.user_id == user_id,
-                Transaction.transaction_type == "DEBIT",
-                Transaction.transaction_date >= first_day_current_month,
-                Transaction.transaction_date <= today
-            )
-            .group_by(Category.category_name)
-            .order_by(func.sum(Transaction.amount).desc())
-            .all()
-        )
-
-        for cat_name, amount in category_spending:
-            pct = (float(amount) / float(current_month_expense) * 100) if current_month_expense > 0 else 0
-            writer.writerow([cat_name, float(amount), f'{pct:.1f}%'])
+    user_id = session["user_id"]
+    username = session.get("username", "user")
+    today = date.today()
+    batch_size = current_app.config.get("EXPORT_FETCH_BATCH_SIZE", 1000)
 
-        writer.writerow([])
+    # ?format=parquet|arrow: transaction history only, as columnar data
+    export_format = request.args.get("format", "csv").lower()
+    if export_format in COLUMNAR_FORMATS:
+        return _columnar_export_response(user_id, username, today, export_format, batch_size)
+    if export_format != "csv":
+        return f"Unsupported export format '{export_format}'", 400
 
-        # ==================== SECTION 4: ANALYSIS & INSIGHTS ====================
-        writer.writerow(['FINANCIAL ANALYSIS & INSIGHTS'])
+    try:
+        # Summary sections are small; build them before streaming so a
+        # failure here still returns a proper error response
+        header_rows, budget_count = summary_rows(user_id, username, today)
 
-        # Insight 1: Spending trend
-        if last_month_expense > 0:
-            diff = float(abs(current_month_expense - last_month_expense))
-            if current_month_expense > last_month_expense:
-                writer.writerow(['Spending Trend', f'Your spending increased by {diff:.2f} compared to last month'])
-            else:
-                writer.writerow(['Spending Trend', f'Good! You saved {diff:.2f} compared to last month'])
+    except Exception as e:
+        current_app.logger.error(f"CSV export error - User: {session.get('username', 'Unknown')}, Error: {str(e)}")
+        return "Error exporting transactions", 500
 
-        # Insight 2: Budget health
-        if budgets:
-            if over_budget_count > 0:
-                writer.writerow(['Budget Health', f'ATTENTION: {over_budget_count} categor{"y is" if over_budget_count == 1 else "ies are"} over budget'])
-            else:
-                writer.writerow(['Budget Health', 'Excellent! All categories are within budget'])
-
-        # Insight 3: Savings rate
-        if current_month_income > 0:
-            savings = float(current_month_income) - float(current_month_expense)
-            savings_rate = (savings / float(current_month_income)) * 100
-            writer.writerow(['Savings Rate', f'{savings_rate:.1f}% ({savings:.2f} saved this month)'])
-
-        # Insight 4: Top spending category
-        if category_spending:
-            top_category, top_amount = category_spending[0]
-            writer.writerow(['Top Spending Category', f'{top_category} ({float(top_amount):.2f})'])
-
-        writer.writerow([])
-        writer.writerow([])
-
-        # ==================== SECTION 5: TRANSACTION DETAILS ====================
-        writer.writerow(['DETAILED TRANSACTION HISTORY'])
-        writer.writerow(['Date', 'Type', 'Category', 'Amount'])
-
-        transactions = (
-            db.session.query(
-                Transaction.transaction_date,
-                Transaction.transaction_type,
-                Category.category_name,
-                Transaction.amount
-            )
-            .join(Category, Transaction.category_id == Category.category_id)
-            .filter(Transaction.user_id == user_id)
-            .order_by(Transaction.transaction_date.desc())
-            .all()
-        )
+    flush_rows = current_app.config.get("EXPORT_FLUSH_ROWS", 500)
+    exported = {"rows": 0}
 
-        for txn in transactions:
-            writer.writerow([
-                txn.transaction_date.strftime('%Y-%m-%d'),
-                txn.transaction_type,
-                txn.category_name,
-                float(txn.amount)
-            ])
+    def generate():
+        try:
+            rows = chain(header_rows, history_rows(user_id, batch_size, progress=lambda n: exported.update(rows=n)))
+            yield from stream_csv(rows, flush_rows)
+            current_app.logger.info(f"Comprehensive CSV export - User: {username}, Transactions: {exported['rows']}, Budgets: {budget_count}")
+        except Exception as e:
+            # Headers are already sent; the client sees a truncated download
+            current_app.logger.error(f"CSV export stream error - User: {username}, after {exported['rows']} rows, Error: {str(e)}")
+            raise
+
+    # Stream as a downloadable file
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/csv',
+        headers={
+            'Content-Disposition': f'attachment; filename={report_filename(username, today)}'
+        }
+    )
 
-        output.seek(0)
 
-        current_app.logger.info(f"Comprehensive CSV export - User: {username}, Transactions: {len(transactions)}, Budgets: {len(budgets)}")
+def _columnar_export_response(user_id, username, today, export_format, batch_size):
+    """Stream a user's history as Parquet or Arrow IPC"""
+    if not columnar_available():
+        return "Columnar export is not available on this server (pyarrow is not installed)", 501
 
-        # Return as downloadable file
-        return Response(
-            output.getvalue(),
-            mimetype='text/csv',
-            headers={
-                'Content-Disposition': f'attachment; filename={username}_financial_report_{today.strftime("%Y%m%d")}.csv'
-            }
-        )
+    exported = {"rows": 0}
 
-    except Exception as e:
-        current_app.logger.error(f"CSV export error - User: {session.get('username', 'Unknown')}, Error: {str(e)}")
-        return "Error exporting transactions", 500
+    def generate():
+        try:
+            yield from stream_columnar(user_id, export_format, batch_size, progress=lambda n: exported.update(rows=n))
+            current_app.logger.info(f"Columnar export ({export_format}) - User: {username}, Transactions: {exported['rows']}")
+        except Exception as e:
+            current_app.logger.error(f"Columnar export stream error - User: {username}, after {exported['rows']} rows, Error: {str(e)}")
+            raise
+
+    mimetype = COLUMNAR_FORMATS[export_format][0]
+    return Response(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers={
+            'Content-Disposition': f'attachment; filename={columnar_filename(username, today, export_format)}'
+        }
+    )
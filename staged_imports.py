@@ -0,0 +1,171 @@
+"""
+Staged Imports - Validated Upload Rows Awaiting Commit
+======================================================
+Valid rows of an import job are written to staged_transactions as each
+chunk is validated, so they are never parsed or validated twice:
+
+- stage_rows()          append a chunk's valid rows (bulk_writes)
+- staged_fingerprints() (date, cents, category) of rows already staged,
+                        so corrected rows are checked against them too
+- commit_staged()       move a job's rows into transactions with one
+                        INSERT ... SELECT and a grouped ledger update
+- clear_staged()        drop a job's rows (discard, or an interrupted pass)
+- imported_row_count()  rows of a job whose transactions still exist
+
+Committing also records each row's upload row hash (upload_row_hashes),
+so later uploads skip rows that were already imported.
+
+A job whose file had errors keeps its valid rows staged; the user can
+commit them as they are or upload just the corrected rows as another
+pass over the same job (pass_number tells the passes apart).
+"""
+
+import uuid
+
+from sqlalchemy import delete, exists, func, insert, literal, select
+
+from extensions import db
+from models import StagedTransaction, Transaction, UploadRowHash
+from ledger import record_grouped_additions
+from bulk_writes import bulk_insert_rows
+
+STAGED_COLUMNS = (
+    "job_id",
+    "pass_number",
+    "row_number",
+    "transaction_id",
+    "user_id",
+    "transaction_type",
+    "amount",
+    "category_id",
+    "transaction_date",
+    "row_hash",
+)
+
+# Columns copied into transactions on commit
+COMMIT_COLUMNS = ("transaction_id", "user_id", "transaction_type", "amount", "category_id", "transaction_date")
+
+# Columns copied into upload_row_hashes on commit (plus the job_id)
+ROW_HASH_COLUMNS = ("transaction_id", "user_id", "row_hash", "transaction_date")
+
+
+def stage_rows(job_id, user_id, pass_number, valid):
+    """
+    Stage a chunk's valid, de-duplicated rows (does not commit).
+
+    Args:
+        valid: Frame from upload_validation.split_duplicates()
+
+    Returns:
+        Number of rows staged
+    """
+    rows = [
+        {
+            "job_id": job_id,
+            "pass_number": pass_number,
+            "row_number": int(record.row),
+            "transaction_id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "transaction_type": record.type,
+            "amount": round(float(record.amount), 2),
+            "category_id": int(record.category_id),
+            "transaction_date": record.date,
+            "row_hash": record.row_hash,
+        }
+        for record in valid.itertuples(index=False)
+    ]
+    return bulk_insert_rows(StagedTransaction, STAGED_COLUMNS, rows)
+
+
+def staged_count(job_id):
+    return db.session.query(func.count(StagedTransaction.staged_id)).filter(StagedTransaction.job_id == job_id).scalar()
+
+
+def staged_fingerprints(job_id):
+    """(date, amount in cents, category_id) of a job's staged rows"""
+    rows = db.session.query(
+        StagedTransaction.transaction_date,
+        StagedTransaction.amount,
+        StagedTransaction.category_id
+    ).filter(StagedTransaction.job_id == job_id).all()
+    return {(row.transaction_date, int(round(row.amount * 100)), row.category_id) for row in rows}
+
+
+def clear_staged(job_id, from_pass=None):
+    """Delete a job's staged rows, or only those of from_pass onwards (does not commit)"""
+    stmt = delete(StagedTransaction).where(StagedTransaction.job_id == job_id)
+    if from_pass is not None:
+        stmt = stmt.where(StagedTransaction.pass_number >= from_pass)
+    db.session.execute(stmt.execution_options(synchronize_session=False))
+
+
+def commit_staged(job_id, user_id):
+    """
+    Move a job's staged rows into transactions (does not commit).
+    Rows that meanwhile arrived through another path are dropped first.
+
+    Returns:
+        Number of transactions inserted
+    """
+    db.session.execute(
+        delete(StagedTransaction)
+        .where(
+            StagedTransaction.job_id == job_id,
+            exists().where(
+                Transaction.user_id == StagedTransaction.user_id,
+                Transaction.transaction_date == StagedTransaction.transaction_date,
+                Transaction.amount == StagedTransaction.amount,
+                Transaction.category_id == StagedTransaction.category_id
+            )
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+    groups = (
+        db.session.query(
+            StagedTransaction.transaction_date,
+            StagedTransaction.category_id,
+            StagedTransaction.transaction_type,
+            func.sum(StagedTransaction.amount),
+            func.count(StagedTransaction.staged_id)
+        )
+        .filter(StagedTransaction.job_id == job_id)
+        .group_by(
+            StagedTransaction.transaction_date,
+            StagedTransaction.category_id,
+            StagedTransaction.transaction_type
+        )
+        .all()
+    )
+    inserted = sum(group[4] for group in groups)
+    if not inserted:
+        return 0
+
+    db.session.execute(
+        insert(Transaction).from_select(
+            list(COMMIT_COLUMNS),
+            select(*[StagedTransaction.__table__.c[column] for column in COMMIT_COLUMNS])
+            .where(StagedTransaction.job_id == job_id)
+        )
+    )
+    staged = StagedTransaction.__table__.c
+    db.session.execute(
+        insert(UploadRowHash).from_select(
+            list(ROW_HASH_COLUMNS) + ["job_id"],
+            select(*[staged[column] for column in ROW_HASH_COLUMNS], literal(job_id))
+            .where(staged.job_id == job_id, staged.row_hash.isnot(None))
+        )
+    )
+    record_grouped_additions(user_id, groups)
+    clear_staged(job_id)
+    return inserted
+
+
+def imported_row_count(job_id):
+    """Rows a job imported whose transactions have not been deleted since"""
+    return (
+        db.session.query(func.count(UploadRowHash.transaction_id))
+        .join(Transaction, Transaction.transaction_id == UploadRowHash.transaction_id)
+        .filter(UploadRowHash.job_id == job_id)
+        .scalar()
+    )
@@ -141,11 +141,60 @@ function makeChartsResponsive() {
     });
 }
 
+// ===== Background Report Export =====
+// "Export CSV" links queue an export job and poll it, so a large report
+// is built off the request cycle; the file downloads when it is ready.
+function initBackgroundExport() {
+    let exportInProgress = false;
+
+    // Capture phase, so the page-navigation loader never sees the click
+    document.addEventListener('click', async function(e) {
+        const link = e.target.closest('a[href="/export-transactions"]');
+        if (!link || !window.fetch) return;
+
+        e.preventDefault();
+        e.stopPropagation();
+        if (exportInProgress) {
+            Toast.info('Your report is already being prepared...');
+            return;
+        }
+
+        exportInProgress = true;
+        try {
+            const submit = await fetch('/exports', {
+                method: 'POST',
+                headers: {'Content-Type': 'application/json'},
+                body: JSON.stringify({format: link.dataset.exportFormat || 'csv'})
+            });
+            if (!submit.ok) throw new Error('submit failed');
+            let job = await submit.json();
+            Toast.info('Preparing your report...');
+
+            while (job.status === 'queued' || job.status === 'running') {
+                await new Promise(resolve => setTimeout(resolve, 1000));
+                const poll = await fetch(job.status_url, {cache: 'no-store'});
+                if (!poll.ok) throw new Error('poll failed');
+                job = await poll.json();
+            }
+
+            if (job.status !== 'done') throw new Error(job.error || 'export failed');
+            window.location.href = job.download_url;
+            Toast.success('Report ready - downloading');
+        } catch (err) {
+            // Fall back to the direct (streamed) export
+            window.location.href = '/export-transactions';
+        } finally {
+            exportInProgress = false;
+        }
+    }, true);
+}
+
 // ===== Initialize Everything =====
 document.addEventListener('DOMContentLoaded', function() {
     initMobileMenu();
     enhanceForms();
     makeChartsResponsive();
+    initBackgroundExport();
 
     // Show success message if present (from URL params)
     const urlParams = new URLSearchParams(window.location.search);
@@ -0,0 +1,51 @@
+import os
+import sys
+import tempfile
+
+import pytest
+from cryptography.fernet import Fernet
+
+# models.py builds its field encryptor at import time, and app.py creates
+# the app (and a logs/ directory) on import
+os.environ.setdefault("ENCRYPTION_KEY", Fernet.generate_key().decode())
+_workdir = tempfile.mkdtemp(prefix="finance_tests_")
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(_workdir, "test.db")
+os.chdir(_workdir)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config  # noqa: E402
+
+# The pool / connect_args settings are PostgreSQL-specific
+config.Config.SQLALCHEMY_ENGINE_OPTIONS = {}
+config.Config.UPLOAD_SPOOL_DIR = os.path.join(_workdir, "uploads")
+
+
+@pytest.fixture
+def app():
+    from app import app as flask_app
+    from extensions import db, cache
+
+    with flask_app.app_context():
+        db.drop_all()
+        db.create_all()
+        cache.clear()
+        yield flask_app
+        db.session.remove()
+
+
+@pytest.fixture
+def user(app):
+    """A user with Food / Rent (DEBIT) and Salary (CREDIT) categories; returns user_id"""
+    from extensions import db
+    from models import User, Category
+
+    account = User(full_name="Test", mobile_number="1", email="test@example.com", username="test", password_hash="x")
+    db.session.add(account)
+    db.session.add_all([
+        Category(category_name="Food", category_type="DEBIT"),
+        Category(category_name="Rent", category_type="DEBIT"),
+        Category(category_name="Salary", category_type="CREDIT"),
+    ])
+    db.session.commit()
+    return account.user_id
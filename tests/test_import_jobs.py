@@ -0,0 +1,70 @@
+from datetime import date
+from io import BytesIO
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+import import_jobs
+from extensions import db
+from models import Transaction
+
+FIRST_DAY, LAST_DAY = date(2026, 9, 1), date(2026, 9, 30)
+HEADER = "Transaction Date (YYYY-MM-DD),Transaction Type (CREDIT/DEBIT),Amount,Category Name\n"
+
+
+def _upload(body, filename="upload.csv"):
+    return FileStorage(stream=BytesIO((HEADER + body).encode()), filename=filename)
+
+
+@pytest.fixture
+def run_inline(app, monkeypatch):
+    """Run queued jobs synchronously instead of on the worker pool"""
+    monkeypatch.setattr(import_jobs, "_queue", lambda job_id: import_jobs._run_import(app, job_id))
+
+
+def _reload(job):
+    db.session.expire_all()
+    return import_jobs.get_import_job(job.job_id, job.user_id)
+
+
+def test_partial_correction_stays_staged_until_committed(user, run_inline):
+    job, _ = import_jobs.submit_import(user, _upload(
+        "2026-09-01,DEBIT,10,Food\n"
+        "2026-09-02,DEBIT,20,Rent\n"
+        "2026-09-03,DEBIT,30,Nope\n"
+        "2026-09-04,DEBIT,40,Nope\n"
+        "2026-09-05,DEBIT,50,Nope\n"
+    ), FIRST_DAY, LAST_DAY)
+    job = _reload(job)
+    assert (job.status, job.staged_count, job.error_count) == ("staged", 2, 3)
+
+    # Fix only one of the three error rows
+    assert import_jobs.resubmit_import(job, _upload("2026-09-03,DEBIT,30,Food\n", "fixed.csv"))
+    job = _reload(job)
+
+    assert job.status == "staged"
+    assert Transaction.query.count() == 0
+    assert job.staged_count == 3
+    assert (job.total_rows, job.valid_count, job.error_count) == (6, 3, 2)
+    assert [error["row"] for error in import_jobs.job_errors(job)] == [4, 5, 6]
+
+    assert import_jobs.commit_import(job) == 3
+    job = _reload(job)
+    assert (job.status, job.imported_count, job.staged_count) == ("done", 3, 0)
+    assert Transaction.query.count() == 3
+
+
+def test_correction_errors_are_added_to_earlier_ones(user, run_inline):
+    job, _ = import_jobs.submit_import(user, _upload(
+        "2026-09-01,DEBIT,10,Food\n"
+        "2026-09-03,DEBIT,30,Nope\n"
+    ), FIRST_DAY, LAST_DAY)
+    job = _reload(job)
+
+    import_jobs.resubmit_import(job, _upload("2026-09-03,DEBIT,30,Still wrong\n", "fixed.csv"))
+    job = _reload(job)
+
+    errors = import_jobs.job_errors(job)
+    assert job.status == "staged"
+    assert (job.total_rows, job.valid_count, job.error_count) == (3, 1, 2)
+    assert [(error["row"], error.get("pass")) for error in errors] == [(3, None), (2, 2)]
@@ -0,0 +1,105 @@
+import uuid
+from datetime import date, datetime, timedelta
+
+import pytest
+
+import import_jobs
+from extensions import db
+from models import ImportJob, StagedTransaction, Transaction, UploadRowHash
+from staged_imports import stage_rows, staged_count, commit_staged
+from upload_ingest import ingest_upload
+
+FIRST_DAY, LAST_DAY = date(2026, 9, 1), date(2026, 9, 30)
+HEADER = "Transaction Date (YYYY-MM-DD),Transaction Type (CREDIT/DEBIT),Amount,Category Name\n"
+
+
+@pytest.fixture
+def job(user, tmp_path):
+    """A queued import job for a CSV with 3 valid rows and 2 invalid ones"""
+    path = tmp_path / "upload.csv"
+    path.write_text(
+        HEADER
+        + "2026-09-01,DEBIT,10.50,Food\n"
+        + "2026-09-02,CREDIT,1000,Salary\n"
+        + "2026-09-03,DEBIT,20,Nope\n"
+        + "2026-10-01,DEBIT,30,Rent\n"
+        + "2026-09-04,DEBIT,40,Rent\n"
+    )
+    record = ImportJob(
+        job_id=str(uuid.uuid4()),
+        user_id=user,
+        filename="upload.csv",
+        file_ext="csv",
+        spool_path=str(path),
+        date_from=FIRST_DAY,
+        date_to=LAST_DAY
+    )
+    db.session.add(record)
+    db.session.commit()
+    return record
+
+
+def _stage(job):
+    return ingest_upload(
+        job.user_id, job.spool_path, job.file_ext, FIRST_DAY, LAST_DAY,
+        sink=lambda valid: stage_rows(job.job_id, job.user_id, 1, valid)
+    )
+
+
+def test_file_with_errors_stages_only_valid_rows(job):
+    result = _stage(job)
+
+    assert not result.success
+    assert (result.total_rows, result.valid_count, result.error_count) == (5, 3, 2)
+    assert [error["row"] for error in result.errors] == [4, 5]
+    assert staged_count(job.job_id) == 3
+    assert Transaction.query.count() == 0
+
+
+def test_commit_inserts_valid_rows_and_clears_staging(job):
+    _stage(job)
+
+    assert commit_staged(job.job_id, job.user_id) == 3
+    db.session.commit()
+
+    rows = Transaction.query.order_by(Transaction.transaction_date).all()
+    assert [(row.transaction_date.day, row.transaction_type, float(row.amount)) for row in rows] == [
+        (1, "DEBIT", 10.5), (2, "CREDIT", 1000.0), (4, "DEBIT", 40.0)
+    ]
+    assert StagedTransaction.query.count() == 0
+    assert UploadRowHash.query.count() == 3
+
+
+def test_commit_skips_rows_that_arrived_meanwhile(job):
+    _stage(job)
+    food = StagedTransaction.query.filter_by(transaction_date=date(2026, 9, 1)).one()
+    db.session.add(Transaction(
+        user_id=job.user_id, transaction_type="DEBIT", amount=food.amount,
+        category_id=food.category_id, transaction_date=food.transaction_date
+    ))
+    db.session.commit()
+
+    assert commit_staged(job.job_id, job.user_id) == 2
+    db.session.commit()
+    assert Transaction.query.count() == 3
+    assert StagedTransaction.query.count() == 0
+
+
+def test_a_job_is_claimed_once(job):
+    assert import_jobs._claim(job.job_id)
+    assert not import_jobs._claim(job.job_id)
+
+    db.session.expire_all()
+    claimed = db.session.get(ImportJob, job.job_id)
+    assert (claimed.status, claimed.attempts) == ("running", 1)
+
+
+def test_a_stale_running_job_can_be_claimed_again(app, job):
+    assert import_jobs._claim(job.job_id)
+    stale = datetime.utcnow() - timedelta(seconds=app.config["IMPORT_JOB_STALE_SECONDS"] + 60)
+    ImportJob.query.filter_by(job_id=job.job_id).update({"heartbeat_at": stale})
+    db.session.commit()
+
+    assert import_jobs._claim(job.job_id)
+    db.session.expire_all()
+    assert db.session.get(ImportJob, job.job_id).attempts == 2
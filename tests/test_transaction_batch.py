@@ -0,0 +1,34 @@
+from datetime import date
+
+from extensions import db
+from models import Category, Transaction
+from transaction_batch import apply_transaction_batch
+
+
+def _transaction(user_id):
+    food = Category.query.filter_by(category_name="Food").one()
+    row = Transaction(user_id=user_id, transaction_type="DEBIT", amount=10, category_id=food.category_id,
+                      transaction_date=date(2026, 9, 1))
+    db.session.add(row)
+    db.session.commit()
+    return row.transaction_id
+
+
+def test_update_without_fields_is_rejected(user):
+    transaction_id = _transaction(user)
+
+    result = apply_transaction_batch(user, [{"op": "update", "transaction_id": transaction_id}], atomic=False)
+
+    assert not result.applied
+    assert result.items[0].status == "error"
+    assert result.items[0].errors == ["No fields to update"]
+
+
+def test_update_with_a_field_is_applied(user):
+    transaction_id = _transaction(user)
+
+    result = apply_transaction_batch(user, [{"op": "update", "transaction_id": transaction_id, "description": "lunch"}])
+
+    assert result.applied
+    assert result.items[0].status == "updated"
+    assert db.session.get(Transaction, transaction_id).description == "lunch"
@@ -0,0 +1,50 @@
+from datetime import date, datetime
+
+import pandas as pd
+
+from upload_validation import DATE_COLUMN, UPLOAD_COLUMNS, row_hashes
+
+
+def _frame(*rows):
+    return pd.DataFrame(list(rows), columns=UPLOAD_COLUMNS)
+
+
+def test_row_hashes_match_across_date_formats():
+    hashes = row_hashes(_frame(
+        ['2026-09-03', 'DEBIT', '7.50', 'Rent'],
+        ['2026/09/03', 'debit', '7.5', 'rent'],
+        ['03-09-2026', ' DEBIT ', 7.5, 'Rent '],
+        ['03/09/2026', 'DEBIT', 7.50, 'RENT'],
+        [datetime(2026, 9, 3), 'DEBIT', 7.5, 'Rent'],
+        [date(2026, 9, 3), 'DEBIT', 7.5, 'Rent'],
+    ))
+    assert hashes.nunique() == 1
+
+
+def test_row_hashes_match_native_date_column():
+    text = row_hashes(_frame(['2026-09-03', 'DEBIT', '7.50', 'Rent']))
+    native = _frame(['2026-09-03', 'DEBIT', 7.5, 'Rent'])
+    native[DATE_COLUMN] = pd.to_datetime(native[DATE_COLUMN])
+    assert row_hashes(native).tolist() == text.tolist()
+
+
+def test_row_hashes_tell_transactions_apart():
+    hashes = row_hashes(_frame(
+        ['2026-09-03', 'DEBIT', '7.50', 'Rent'],
+        ['2026-09-04', 'DEBIT', '7.50', 'Rent'],
+        ['2026-09-03', 'CREDIT', '7.50', 'Rent'],
+        ['2026-09-03', 'DEBIT', '7.51', 'Rent'],
+        ['2026-09-03', 'DEBIT', '7.50', 'Food'],
+    ))
+    assert hashes.nunique() == 5
+
+
+def test_row_hashes_keep_unparseable_cells_as_written():
+    df = _frame(
+        ['not a date', 'DEBIT', 'abc', 'Rent'],
+        ['not a date', 'DEBIT', 'abd', 'Rent'],
+        [None, None, None, None],
+    )
+    hashes = row_hashes(df)
+    assert hashes.index.tolist() == df.index.tolist()
+    assert hashes.nunique() == 3
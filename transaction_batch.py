@@ -0,0 +1,342 @@
+"""
+Transaction Batch - Multi-Operation Writes
+==========================================
+Applies a list of create / update / delete operations for one user in a
+single database transaction, for sync scripts and mobile clients that
+would otherwise make one form post per row.
+
+    {"operations": [
+        {"op": "create", "ref": "c1", "transaction_type": "DEBIT", "amount": "12.50",
+         "category": "Food", "transaction_date": "2026-01-15", "description": "lunch"},
+        {"op": "update", "transaction_id": "...", "amount": 14},
+        {"op": "delete", "transaction_id": "..."}
+    ], "atomic": true}
+
+Validation runs over the whole batch first, against the user's cached
+category catalog and one query for the targeted transactions. Then:
+- creates go through bulk_writes (multi-row INSERT, or COPY on PostgreSQL)
+- updates are one UPDATE ... SET col = CASE transaction_id WHEN ... END
+  per chunk of rows
+- deletes are one DELETE ... WHERE transaction_id IN (...)
+followed by a single ledger update and commit.
+
+With atomic (the default) any invalid operation rejects the whole batch;
+otherwise invalid operations are reported and the rest are applied.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import List, Optional
+
+from sqlalchemy import case, delete, update
+
+from extensions import db
+from models import Transaction
+from ledger import record_transaction_changes, TxnRow
+from category_catalog import get_category_catalog
+from bulk_writes import new_transaction_row, bulk_insert_transactions
+
+OPERATIONS = ("create", "update", "delete")
+# Operation keys that set a column; an update needs at least one
+VALUE_FIELDS = ("transaction_type", "amount", "transaction_date", "category_id", "category", "description")
+TRANSACTION_TYPES = ("CREDIT", "DEBIT")
+MAX_AMOUNT = Decimal("9999999999.99")  # Numeric(12, 2)
+
+# Rows per UPDATE statement (each row binds a few parameters per column)
+UPDATE_CHUNK_SIZE = 200
+
+
+@dataclass
+class BatchItemResult:
+    """Outcome of one operation in a batch"""
+    index: int
+    op: str
+    ref: Optional[str] = None
+    transaction_id: Optional[str] = None
+    status: str = "pending"
+    errors: List[str] = field(default_factory=list)
+
+    def to_dict(self):
+        result = {"index": self.index, "op": self.op, "status": self.status}
+        if self.ref is not None:
+            result["ref"] = self.ref
+        if self.transaction_id is not None:
+            result["transaction_id"] = self.transaction_id
+        if self.errors:
+            result["errors"] = self.errors
+        return result
+
+
+@dataclass
+class BatchResult:
+    """Outcome of a whole batch"""
+    items: List[BatchItemResult] = field(default_factory=list)
+    applied: bool = False
+
+    @property
+    def error_count(self):
+        return sum(1 for item in self.items if item.errors)
+
+    def summary(self):
+        counts = {"created": 0, "updated": 0, "deleted": 0, "errors": self.error_count}
+        for item in self.items:
+            if item.status in counts:
+                counts[item.status] += 1
+        return counts
+
+    def to_dict(self):
+        return {
+            "applied": self.applied,
+            "summary": self.summary(),
+            "results": [item.to_dict() for item in self.items],
+        }
+
+
+# =========================
+# Validation
+# =========================
+
+class _CategoryLookup:
+    """Name/id resolution against the user's category catalog"""
+
+    def __init__(self, user_id):
+        self.catalog = get_category_catalog(user_id)
+        self.names = {txn_type: self.catalog.name_map(txn_type) for txn_type in TRANSACTION_TYPES}
+        self.any_type = self.catalog.name_map()
+
+    def resolve(self, item, txn_type, errors):
+        if item.get("category_id") not in (None, ""):
+            try:
+                category_id = int(item["category_id"])
+            except (TypeError, ValueError):
+                errors.append("category_id must be an integer")
+                return None
+            if self.catalog.get(category_id) is None:
+                errors.append(f"Category {category_id} not found")
+                return None
+            return category_id
+
+        name = str(item.get("category") or "").strip()
+        if not name:
+            errors.append("Category is required")
+            return None
+        category_id = self.names.get(txn_type, {}).get(name.lower()) or self.any_type.get(name.lower())
+        if category_id is None:
+            errors.append(f"Category '{name}' not found. Please use an existing category.")
+        return category_id
+
+
+def _parse_amount(value, errors):
+    try:
+        amount = Decimal(str(value).strip())
+    except (InvalidOperation, ValueError):
+        errors.append("Amount must be a valid number")
+        return None
+    if not amount.is_finite() or amount <= 0:
+        errors.append("Amount must be greater than 0")
+        return None
+    if amount > MAX_AMOUNT:
+        errors.append(f"Amount must not exceed {MAX_AMOUNT}")
+        return None
+    return amount.quantize(Decimal("0.01"))
+
+
+def _parse_date(value, errors):
+    try:
+        return datetime.strptime(str(value).strip(), "%Y-%m-%d").date()
+    except ValueError:
+        errors.append("Invalid date format. Use YYYY-MM-DD (e.g., 2024-01-15)")
+        return None
+
+
+def _validate_values(item, current, categories, errors):
+    """
+    Merge an operation's fields over the current row values (empty for
+    creates) and validate the result.
+    """
+    values = dict(current)
+
+    if "transaction_type" in item:
+        txn_type = str(item["transaction_type"] or "").strip().upper()
+        if txn_type not in TRANSACTION_TYPES:
+            errors.append("Transaction Type must be CREDIT or DEBIT")
+        values["transaction_type"] = txn_type
+
+    if "amount" in item:
+        values["amount"] = _parse_amount(item["amount"], errors)
+
+    if "transaction_date" in item:
+        values["transaction_date"] = _parse_date(item["transaction_date"], errors)
+
+    if "category_id" in item or "category" in item:
+        values["category_id"] = categories.resolve(item, values.get("transaction_type"), errors)
+
+    if "description" in item:
+        description = str(item["description"] or "").strip()
+        values["description"] = description or None
+
+    # Fields that were neither supplied nor already on the row
+    for column, keys, label in (
+        ("transaction_type", ("transaction_type",), "Transaction Type"),
+        ("amount", ("amount",), "Amount"),
+        ("category_id", ("category_id", "category"), "Category"),
+        ("transaction_date", ("transaction_date",), "Transaction Date"),
+    ):
+        if values.get(column) is None and not any(key in item for key in keys):
+            errors.append(f"{label} is required")
+
+    return values
+
+
+# =========================
+# Statements
+# =========================
+
+def _multi_row_update(rows):
+    """UPDATE many rows by primary key, one statement per chunk"""
+    columns = ["transaction_type", "amount", "category_id", "transaction_date", "description"]
+    for start in range(0, len(rows), UPDATE_CHUNK_SIZE):
+        chunk = rows[start:start + UPDATE_CHUNK_SIZE]
+        ids = [row["transaction_id"] for row in chunk]
+        db.session.execute(
+            update(Transaction)
+            .where(Transaction.transaction_id.in_(ids))
+            .values({
+                column: case(
+                    {row["transaction_id"]: row[column] for row in chunk},
+                    value=Transaction.transaction_id
+                )
+                for column in columns
+            })
+            .execution_options(synchronize_session=False)
+        )
+
+
+def _as_txn_row(values):
+    return TxnRow(values["transaction_date"], values["category_id"], values["transaction_type"], values["amount"])
+
+
+def apply_transaction_batch(user_id, operations, atomic=True):
+    """
+    Validate and apply a batch of operations for a user.
+
+    Args:
+        user_id: Owner of every row touched
+        operations: list of operation dicts (see module docstring)
+        atomic: Reject the whole batch if any operation is invalid
+
+    Returns:
+        BatchResult (changes are committed when result.applied is True)
+    """
+    result = BatchResult()
+    categories = _CategoryLookup(user_id)
+
+    # One query for every row the batch updates or deletes
+    target_ids = {
+        str(item.get("transaction_id"))
+        for item in operations
+        if isinstance(item, dict) and item.get("op") in ("update", "delete") and item.get("transaction_id")
+    }
+    existing = {}
+    if target_ids:
+        existing = {
+            row.transaction_id: row._asdict()
+            for row in db.session.query(
+                Transaction.transaction_id,
+                Transaction.transaction_type,
+                Transaction.amount,
+                Transaction.category_id,
+                Transaction.transaction_date,
+                Transaction.description
+            ).filter(
+                Transaction.user_id == user_id,
+                Transaction.transaction_id.in_(target_ids)
+            ).all()
+        }
+
+    creates, updates, deletes = [], [], []
+    seen_ids = set()
+
+    for index, item in enumerate(operations):
+        if not isinstance(item, dict):
+            result.items.append(BatchItemResult(index, "unknown", status="error", errors=["Operation must be an object"]))
+            continue
+
+        op = str(item.get("op", "")).lower()
+        entry = BatchItemResult(index, op or "unknown", ref=item.get("ref"))
+        result.items.append(entry)
+
+        if op not in OPERATIONS:
+            entry.errors.append(f"op must be one of {', '.join(OPERATIONS)}")
+            continue
+
+        if op == "create":
+            values = _validate_values(item, {}, categories, entry.errors)
+            if not entry.errors:
+                values = new_transaction_row(user_id, values)
+                entry.transaction_id = values["transaction_id"]
+                creates.append((entry, values))
+            continue
+
+        transaction_id = str(item.get("transaction_id") or "")
+        entry.transaction_id = transaction_id or None
+        if not transaction_id:
+            entry.errors.append("transaction_id is required")
+            continue
+        if transaction_id in seen_ids:
+            entry.errors.append("transaction_id appears more than once in this batch")
+            continue
+        seen_ids.add(transaction_id)
+
+        current = existing.get(transaction_id)
+        if current is None:
+            entry.errors.append("Transaction not found")
+            continue
+
+        if op == "update":
+            if not any(key in item for key in VALUE_FIELDS):
+                entry.errors.append("No fields to update")
+                continue
+            values = _validate_values(item, current, categories, entry.errors)
+            if not entry.errors:
+                updates.append((entry, current, values))
+        else:
+            deletes.append((entry, current))
+
+    for entry in result.items:
+        if entry.errors:
+            entry.status = "error"
+
+    if result.error_count and (atomic or not (creates or updates or deletes)):
+        return result
+
+    if creates:
+        bulk_insert_transactions([values for _, values in creates])
+    if updates:
+        _multi_row_update([values for _, _, values in updates])
+    if deletes:
+        db.session.execute(
+            delete(Transaction)
+            .where(
+                Transaction.user_id == user_id,
+                Transaction.transaction_id.in_([current["transaction_id"] for _, current in deletes])
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    record_transaction_changes(
+        user_id,
+        added=[_as_txn_row(values) for _, values in creates] + [_as_txn_row(values) for _, _, values in updates],
+        removed=[_as_txn_row(current) for _, current, _ in updates] + [_as_txn_row(current) for _, current in deletes]
+    )
+    db.session.commit()
+
+    for entry, _ in creates:
+        entry.status = "created"
+    for entry, _, _ in updates:
+        entry.status = "updated"
+    for entry, _ in deletes:
+        entry.status = "deleted"
+    result.applied = True
+    return result
@@ -0,0 +1,298 @@
+"""
+Transaction Queries - Filtered History with Keyset Pagination
+=============================================================
+Builds the /transactions history query from request filters and pages
+through it with keyset (seek) pagination instead of OFFSET/COUNT.
+
+Rows are ordered by (transaction_date DESC, transaction_id DESC). A page
+boundary is remembered as an opaque cursor holding the (date, id) of the
+edge row, and the next page is simply "rows after that key", which the
+(user_id, transaction_date, transaction_id) index answers directly.
+Page 500 costs the same as page 1.
+
+Result counts are a separate, pluggable step (count_results) chosen per
+deployment with TRANSACTION_COUNT_STRATEGY:
+- "exact":    COUNT(*) of the filtered query
+- "capped":   count at most TRANSACTION_COUNT_CAP rows, shown as "10,000+"
+- "estimate": like capped, but large results use the PostgreSQL
+              planner's row estimate, shown as "~52,300"
+Every strategy caches its answer briefly, keyed by the filter set and
+the user's data version, so flipping between pages and filters does not
+recount.
+"""
+
+import base64
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Optional
+from urllib.parse import urlencode
+
+from flask import current_app
+from sqlalchemy import func, tuple_
+
+from extensions import db, cache
+from cache_helpers import get_data_version
+from models import Transaction, Category
+from transaction_search import search_condition
+
+
+PER_PAGE = 20
+
+
+@dataclass
+class TransactionFilters:
+    """Filters accepted by the transaction history page"""
+    search: str = ""
+    txn_type: str = ""
+    category: str = ""
+    from_date: str = ""
+    to_date: str = ""
+
+    @classmethod
+    def from_args(cls, args):
+        return cls(
+            search=args.get("search", "").strip(),
+            txn_type=args.get("type", ""),
+            category=args.get("category", ""),
+            from_date=args.get("from_date", ""),
+            to_date=args.get("to_date", ""),
+        )
+
+    def query_string(self):
+        """URL-encoded filters, for pagination links"""
+        return urlencode({
+            "search": self.search,
+            "type": self.txn_type,
+            "category": self.category,
+            "from_date": self.from_date,
+            "to_date": self.to_date,
+        })
+
+    def apply(self, query):
+        """Apply the filters to a Transaction/Category query"""
+        if self.txn_type:
+            query = query.filter(Transaction.transaction_type == self.txn_type)
+
+        if self.category:
+            query = query.filter(Transaction.category_id == int(self.category))
+
+        if self.from_date:
+            from_date = datetime.strptime(self.from_date, "%Y-%m-%d").date()
+            query = query.filter(Transaction.transaction_date >= from_date)
+
+        if self.to_date:
+            to_date = datetime.strptime(self.to_date, "%Y-%m-%d").date()
+            query = query.filter(Transaction.transaction_date <= to_date)
+
+        # Search by amount (if numeric), otherwise description / category name
+        if self.search:
+            try:
+                search_amount = float(self.search)
+                query = query.filter(Transaction.amount == search_amount)
+            except ValueError:
+                query = query.filter(search_condition(self.search))
+
+        return query
+
+
+@dataclass
+class KeysetPage:
+    """One page of history plus cursors to its neighbours"""
+    items: List = field(default_factory=list)
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+
+@dataclass
+class ResultCount:
+    """How many rows match the filters, and how to display it"""
+    value: int
+    exact: bool = True
+    estimated: bool = False
+
+    @property
+    def label(self):
+        if self.estimated:
+            return f"~{self.value:,}"
+        if not self.exact:
+            return f"{self.value:,}+"
+        return f"{self.value:,}"
+
+
+# =========================
+# Cursors
+# =========================
+
+def encode_cursor(direction, row):
+    """
+    Opaque cursor for paging away from a row.
+    direction: 'n' (older rows, next page) or 'p' (newer rows, previous page)
+    """
+    raw = f"{direction}|{row.transaction_date.isoformat()}|{row.transaction_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """
+    Returns (direction, transaction_date, transaction_id),
+    or None for a missing or malformed cursor (treated as page 1).
+    """
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        direction, date_str, transaction_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|", 2)
+        if direction not in ("n", "p"):
+            return None
+        return direction, datetime.strptime(date_str, "%Y-%m-%d").date(), transaction_id
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+# =========================
+# Queries
+# =========================
+
+def build_history_query(user_id, filters):
+    """Filtered history rows for a user (unordered)"""
+    query = db.session.query(
+        Transaction.transaction_id,
+        Transaction.transaction_date,
+        Transaction.transaction_type,
+        Transaction.amount,
+        Category.category_name,
+        Category.category_id
+    ).join(Category, Transaction.category_id == Category.category_id).filter(
+        Transaction.user_id == user_id
+    )
+    return filters.apply(query)
+
+
+def fetch_keyset_page(query, cursor_token=None, per_page=PER_PAGE):
+    """
+    Fetch one page of a history query using a cursor from a previous page.
+    Reads per_page + 1 rows to learn whether another page exists.
+    """
+    sort_key = tuple_(Transaction.transaction_date, Transaction.transaction_id)
+    cursor = decode_cursor(cursor_token)
+
+    if cursor is None:
+        rows = (
+            query.order_by(Transaction.transaction_date.desc(), Transaction.transaction_id.desc())
+            .limit(per_page + 1)
+            .all()
+        )
+        has_more, has_before = len(rows) > per_page, False
+        rows = rows[:per_page]
+
+    elif cursor[0] == "n":
+        _, cursor_date, cursor_id = cursor
+        rows = (
+            query.filter(sort_key < tuple_(cursor_date, cursor_id))
+            .order_by(Transaction.transaction_date.desc(), Transaction.transaction_id.desc())
+            .limit(per_page + 1)
+            .all()
+        )
+        has_more, has_before = len(rows) > per_page, True
+        rows = rows[:per_page]
+
+    else:
+        # Walk backwards (ascending) from the cursor, then restore display order
+        _, cursor_date, cursor_id = cursor
+        rows = (
+            query.filter(sort_key > tuple_(cursor_date, cursor_id))
+            .order_by(Transaction.transaction_date.asc(), Transaction.transaction_id.asc())
+            .limit(per_page + 1)
+            .all()
+        )
+        has_more, has_before = True, len(rows) > per_page
+        rows = list(reversed(rows[:per_page]))
+
+    if not rows and cursor is not None:
+        # Stale cursor (rows deleted since the link was rendered)
+        return fetch_keyset_page(query, None, per_page)
+
+    return KeysetPage(
+        items=rows,
+        next_cursor=encode_cursor("n", rows[-1]) if rows and has_more else None,
+        prev_cursor=encode_cursor("p", rows[0]) if rows and has_before else None,
+    )
+
+
+# =========================
+# Count strategies
+# =========================
+
+def _exact_count(query):
+    return ResultCount(query.order_by(None).count())
+
+
+def _capped_count(query, cap):
+    """Count no further than cap + 1 rows"""
+    probe = query.order_by(None).limit(cap + 1).subquery()
+    value = db.session.query(func.count()).select_from(probe).scalar()
+    if value > cap:
+        return ResultCount(cap, exact=False)
+    return ResultCount(value)
+
+
+def _planner_estimate(query):
+    """PostgreSQL planner row estimate for a query, or None elsewhere"""
+    connection = db.session.connection()
+    if connection.dialect.name != "postgresql":
+        return None
+
+    compiled = query.order_by(None).statement.compile(dialect=connection.dialect)
+    plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _estimated_count(query, cap):
+    """Exact below the cap, planner estimate above it"""
+    result = _capped_count(query, cap)
+    if result.exact:
+        return result
+
+    estimate = _planner_estimate(query)
+    if estimate is None:
+        return result
+    return ResultCount(max(estimate, cap), exact=False, estimated=True)
+
+
+COUNT_STRATEGIES = {
+    "exact": lambda query, cap: _exact_count(query),
+    "capped": _capped_count,
+    "estimate": _estimated_count,
+}
+
+
+def count_results(user_id, query, filters):
+    """
+    Count the rows of a filtered history query with the configured
+    strategy, cached per (user, data version, filters).
+    """
+    strategy = current_app.config.get("TRANSACTION_COUNT_STRATEGY", "capped")
+    if strategy not in COUNT_STRATEGIES:
+        strategy = "capped"
+    cap = current_app.config.get("TRANSACTION_COUNT_CAP", 10000)
+
+    cache_key = (
+        f"txn_count:{user_id}:{get_data_version(user_id)}:{strategy}:{cap}:"
+        f"{filters.query_string()}"
+    )
+    result = cache.get(cache_key)
+    if result is None:
+        result = COUNT_STRATEGIES[strategy](query, cap)
+        cache.set(cache_key, result, timeout=current_app.config.get("TRANSACTION_COUNT_CACHE_TIMEOUT", 120))
+    return result
@@ -0,0 +1,127 @@
+"""
+Transaction Search - Description & Category Matching
+====================================================
+Text search over transaction descriptions and category names.
+
+On PostgreSQL the matching is backed by the indexes created in
+migrate_add_search_indexes.py:
+- pg_trgm GIN indexes on transactions.description and
+  categories.category_name, which serve substring ILIKE '%term%'
+  (B-tree indexes cannot serve a leading wildcard)
+- a GIN index on to_tsvector('simple', description) for word-prefix
+  matching ("groc" finds "groceries")
+Relevance is trigram similarity plus full-text rank.
+
+Other databases (SQLite in tests) fall back to plain case-insensitive
+LIKE matching with a simple rank: category prefix, then substring hits.
+"""
+
+import re
+
+from sqlalchemy import func, or_, case, literal_column
+
+from extensions import db
+from models import Transaction, Category
+
+
+# Must match the indexed expression in migrate_add_search_indexes.py exactly
+def _description_tsvector():
+    return func.to_tsvector(
+        literal_column("'simple'::regconfig"),
+        func.coalesce(Transaction.description, literal_column("''"))
+    )
+
+
+def _is_postgres():
+    return db.session.get_bind().dialect.name == "postgresql"
+
+
+def _escape_like(term):
+    """Escape LIKE wildcards so the term matches literally"""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _like_pattern(term):
+    """Substring pattern for the term"""
+    return f"%{_escape_like(term)}%"
+
+
+def _prefix_tsquery(term):
+    """'groc sto' -> 'groc:* & sto:*' (None if the term has no words)"""
+    words = re.findall(r"\w+", term.lower())
+    if not words:
+        return None
+    return " & ".join(f"{word}:*" for word in words)
+
+
+def search_condition(term):
+    """
+    WHERE clause matching transactions whose description or category
+    name contains the term (or, on PostgreSQL, has words starting with it).
+    The query must already join Category.
+    """
+    pattern = _like_pattern(term)
+    conditions = [
+        Transaction.description.ilike(pattern, escape="\\"),
+        Category.category_name.ilike(pattern, escape="\\"),
+    ]
+
+    if _is_postgres():
+        tsquery = _prefix_tsquery(term)
+        if tsquery:
+            conditions.append(
+                _description_tsvector().op("@@")(
+                    func.to_tsquery(literal_column("'simple'::regconfig"), tsquery)
+                )
+            )
+
+    return or_(*conditions)
+
+
+def rank_expression(term):
+    """Relevance score for ORDER BY (higher is better)"""
+    if _is_postgres():
+        rank = func.greatest(
+            func.similarity(func.coalesce(Transaction.description, ""), term),
+            func.similarity(Category.category_name, term)
+        )
+        tsquery = _prefix_tsquery(term)
+        if tsquery:
+            rank = rank + func.ts_rank(
+                _description_tsvector(),
+                func.to_tsquery(literal_column("'simple'::regconfig"), tsquery)
+            )
+        return rank
+
+    return (
+        case((Category.category_name.ilike(f"{_escape_like(term)}%", escape="\\"), 2), else_=0)
+        + case((Category.category_name.ilike(_like_pattern(term), escape="\\"), 1), else_=0)
+        + case((Transaction.description.ilike(_like_pattern(term), escape="\\"), 1), else_=0)
+    )
+
+
+def search_transactions(user_id, term, limit=20):
+    """
+    Best matches for a search term, most relevant first.
+
+    Returns:
+        list of rows (transaction_id, transaction_date, transaction_type,
+        amount, category_name, description, rank)
+    """
+    rank = rank_expression(term).label("rank")
+    return (
+        db.session.query(
+            Transaction.transaction_id,
+            Transaction.transaction_date,
+            Transaction.transaction_type,
+            Transaction.amount,
+            Category.category_name,
+            Transaction.description,
+            rank
+        )
+        .join(Category, Transaction.category_id == Category.category_id)
+        .filter(Transaction.user_id == user_id, search_condition(term))
+        .order_by(rank.desc(), Transaction.transaction_date.desc())
+        .limit(limit)
+        .all()
+    )
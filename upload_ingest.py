@@ -0,0 +1,167 @@
+"""
+Upload Ingest - Chunked Streaming Bulk Import
+=============================================
+Reads a bulk upload file without ever holding all of it in memory:
+
+    path, content_hash = spool_upload(request.files['file'])   # stream to a temp file
+    result = ingest_upload(user_id, path, 'csv', first_day, last_day, sink)
+
+- The file is read UPLOAD_CHUNK_ROWS rows at a time by the reader
+  registered for its extension (upload_readers: pandas for CSV,
+  calamine or read-only openpyxl for Excel).
+- Rows an earlier upload already imported (same row hash, transaction
+  still present) are counted as skipped and dropped before validation.
+- The rest of each chunk is validated and de-duplicated
+  (upload_validation); its valid rows, with their row_hash, go to sink(frame) - staged_imports.stage_rows() for import
+  jobs - then progress(rows_read) is called and the chunk is committed.
+  Nothing reaches the transactions table here; that is the caller's
+  decision once the whole file has been seen.
+
+Memory is bounded by the chunk size plus the duplicate fingerprints
+(one tuple per valid row) and at most UPLOAD_MAX_REPORTED_ERRORS error
+rows kept for the results page; error_count still counts them all.
+"""
+
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass, field
+from typing import List
+
+from flask import current_app
+
+from extensions import db
+from category_catalog import get_category_catalog
+from upload_validation import (
+    validate_upload_frame, existing_fingerprints, split_duplicates, row_hashes, imported_row_hashes
+)
+from upload_readers import iter_upload_chunks
+
+
+class UploadTooLarge(Exception):
+    """Raised by spool_upload() when a file exceeds UPLOAD_MAX_FILE_SIZE"""
+
+
+@dataclass
+class IngestResult:
+    """Counts and reported errors for one ingested file"""
+    total_rows: int = 0
+    valid_count: int = 0
+    duplicate_count: int = 0
+    skipped_count: int = 0
+    error_count: int = 0
+    chunks: int = 0
+    errors: List[dict] = field(default_factory=list)
+
+    @property
+    def success(self):
+        return self.error_count == 0
+
+
+# =========================
+# Spooling
+# =========================
+
+def _spool_dir():
+    path = current_app.config.get("UPLOAD_SPOOL_DIR")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def spool_upload(file_storage):
+    """
+    Copy an uploaded file to a temp file in UPLOAD_SPOOL_DIR, in blocks,
+    hashing it on the way.
+
+    Returns:
+        (path of the spooled file (caller removes it), SHA-256 hex digest)
+
+    Raises:
+        UploadTooLarge: the file is bigger than UPLOAD_MAX_FILE_SIZE
+    """
+    max_size = current_app.config.get("UPLOAD_MAX_FILE_SIZE")
+    extension = os.path.splitext(file_storage.filename or '')[1].lower()
+    fd, path = tempfile.mkstemp(suffix=extension, dir=_spool_dir())
+
+    size = 0
+    digest = hashlib.sha256()
+    try:
+        with os.fdopen(fd, 'wb') as spooled:
+            while True:
+                block = file_storage.stream.read(1024 * 1024)
+                if not block:
+                    break
+                size += len(block)
+                if max_size and size > max_size:
+                    raise UploadTooLarge(f"File is larger than {max_size // (1024 * 1024)} MB")
+                digest.update(block)
+                spooled.write(block)
+    except Exception:
+        os.remove(path)
+        raise
+
+    return path, digest.hexdigest()
+
+
+# =========================
+# Ingestion
+# =========================
+
+def ingest_upload(user_id, path, file_ext, first_day, last_day, sink, existing=None, progress=None):
+    """
+    Validate a spooled upload chunk by chunk, handing valid rows to sink.
+
+    Args:
+        user_id: Owner of the rows
+        path, file_ext: Spooled file and its extension (csv / xlsx / xls)
+        first_day, last_day: Allowed transaction date range
+        sink: callable(frame) receiving each chunk's valid, unique rows
+        existing: Extra fingerprints counted as already imported
+            (added to the user's transactions in the date range)
+        progress: Optional callable(rows_read), called after each chunk
+            inside its transaction
+
+    Returns:
+        IngestResult
+    """
+    result = IngestResult()
+    max_errors = current_app.config.get("UPLOAD_MAX_REPORTED_ERRORS", 1000)
+
+    category_map = get_category_catalog(user_id).name_map()
+    known = existing_fingerprints(user_id, first_day, last_day) | (existing or set())
+    imported = imported_row_hashes(user_id, first_day, last_day)
+    seen = {}
+
+    try:
+        for chunk in iter_upload_chunks(path, file_ext):
+            result.chunks += 1
+            result.total_rows += len(chunk)
+
+            hashes = row_hashes(chunk)
+            already = hashes.isin(imported)
+            result.skipped_count += int(already.sum())
+            chunk = chunk[~already]
+
+            validation = validate_upload_frame(chunk, category_map, first_day, last_day)
+            valid = validation.valid.assign(row_hash=hashes.reindex(validation.valid.index))
+            unique, duplicate_errors = split_duplicates(valid, known, seen)
+
+            errors = validation.errors + duplicate_errors
+            result.duplicate_count += len(duplicate_errors)
+            result.valid_count += len(unique)
+            result.error_count += len(errors)
+            if len(result.errors) < max_errors:
+                errors.sort(key=lambda error: error['row'])
+                result.errors.extend(errors[:max_errors - len(result.errors)])
+
+            if not unique.empty:
+                sink(unique)
+            if progress:
+                progress(result.total_rows)
+            db.session.commit()
+
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return result
@@ -0,0 +1,155 @@
+"""
+Upload Readers - Pluggable Chunk Readers for Bulk Uploads
+=========================================================
+Turns a spooled upload file into DataFrame chunks for upload_ingest,
+without loading the whole workbook:
+
+    for chunk in iter_upload_chunks(path, 'xlsx'):
+        validate_upload_frame(chunk, ...)
+
+Each file extension has one or more registered readers (engines):
+
+- csv:  pandas   - pd.read_csv(chunksize=UPLOAD_CHUNK_ROWS)
+- xlsx: calamine - python-calamine (Rust) row iterator, when installed
+        openpyxl - read-only worksheet iterator (no cell objects kept)
+- xls:  calamine - as above
+        pandas   - pd.read_excel, whole sheet (needs xlrd)
+
+The first available engine in ENGINE_PREFERENCE is used, unless
+UPLOAD_EXCEL_ENGINE names one. Spreadsheet rows are collected
+UPLOAD_CHUNK_ROWS at a time and transposed into columns, so every chunk
+reaches validation with typed columns (datetime64 for date cells, float
+for numeric amounts) and an index of 0-based data rows that continues
+across chunks.
+
+python-calamine is optional: without it Excel files are read by openpyxl.
+"""
+
+from itertools import zip_longest
+
+import pandas as pd
+from flask import current_app
+
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:
+    CalamineWorkbook = None
+
+EXCEL_SHEET = 'Transactions'
+
+# Engines tried in this order when UPLOAD_EXCEL_ENGINE is "auto"
+ENGINE_PREFERENCE = ('calamine', 'openpyxl', 'pandas')
+
+# file extension -> {engine: reader(path, chunk_rows)}
+UPLOAD_READERS = {}
+
+
+def register_reader(file_ext, engine):
+    """Decorator adding a reader(path, chunk_rows) for a file extension"""
+    def decorator(reader):
+        UPLOAD_READERS.setdefault(file_ext, {})[engine] = reader
+        return reader
+    return decorator
+
+
+def _column_names(header):
+    return [
+        str(name).strip() if name not in (None, '') else f"Unnamed: {i}"
+        for i, name in enumerate(header)
+    ]
+
+
+def _frame(columns, rows, start):
+    """DataFrame from a batch of row tuples, built column by column"""
+    width = len(columns)
+    # Rows may be shorter (trailing blanks) or longer (stray cells) than the header
+    values = list(zip_longest(*rows, fillvalue=None))[:width]
+    values += [(None,) * len(rows)] * (width - len(values))
+
+    frame = pd.DataFrame(dict(enumerate(values)), index=range(start, start + len(rows)))
+    frame.columns = columns
+    return frame
+
+
+def _batched_frames(rows, chunk_rows):
+    """Header row plus data rows -> DataFrame chunks of chunk_rows rows"""
+    header = next(rows, None)
+    if header is None:
+        return
+    columns = _column_names(header)
+
+    start = 0
+    batch = []
+    for values in rows:
+        batch.append(values)
+        if len(batch) >= chunk_rows:
+            yield _frame(columns, batch, start)
+            start += len(batch)
+            batch = []
+    if batch:
+        yield _frame(columns, batch, start)
+
+
+# =========================
+# Readers
+# =========================
+
+@register_reader('csv', 'pandas')
+def _csv_chunks(path, chunk_rows):
+    # Index continues across chunks, so row numbers stay file-relative
+    yield from pd.read_csv(path, comment='#', chunksize=chunk_rows)
+
+
+@register_reader('xlsx', 'openpyxl')
+def _openpyxl_chunks(path, chunk_rows):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook[EXCEL_SHEET].iter_rows(values_only=True)
+        yield from _batched_frames(rows, chunk_rows)
+    finally:
+        workbook.close()
+
+
+def _calamine_chunks(path, chunk_rows):
+    workbook = CalamineWorkbook.from_path(path)
+    try:
+        sheet = workbook.get_sheet_by_name(EXCEL_SHEET)
+        # calamine reports blank cells as '', openpyxl and pandas as None
+        rows = (
+            tuple(None if value == '' else value for value in values)
+            for values in sheet.iter_rows()
+        )
+        yield from _batched_frames(rows, chunk_rows)
+    finally:
+        workbook.close()
+
+
+if CalamineWorkbook is not None:
+    register_reader('xlsx', 'calamine')(_calamine_chunks)
+    register_reader('xls', 'calamine')(_calamine_chunks)
+
+
+@register_reader('xls', 'pandas')
+def _legacy_excel_chunks(path, chunk_rows):
+    yield pd.read_excel(path, sheet_name=EXCEL_SHEET)
+
+
+# =========================
+# Public API
+# =========================
+
+def reader_engine(file_ext):
+    """Name of the engine that reads files with this extension"""
+    readers = UPLOAD_READERS[file_ext]
+    configured = current_app.config.get("UPLOAD_EXCEL_ENGINE", "auto")
+    if configured in readers:
+        return configured
+    return next(engine for engine in ENGINE_PREFERENCE if engine in readers)
+
+
+def iter_upload_chunks(path, file_ext, chunk_rows=None):
+    """DataFrame chunks of an upload file, indexed by 0-based data row"""
+    chunk_rows = chunk_rows or current_app.config.get("UPLOAD_CHUNK_ROWS", 5000)
+    return UPLOAD_READERS[file_ext][reader_engine(file_ext)](path, chunk_rows)
@@ -0,0 +1,154 @@
+"""
+Upload Templates - Cached Bulk Upload Templates
+===============================================
+The Excel and CSV templates offered on /bulk-upload depend only on the
+target month and the categories the user can see, so they are built once
+and kept in the shared cache as bytes:
+
+    content, filename, mimetype = get_upload_template(user_id, 'excel', first_day, last_day)
+
+Keys carry the user's and the system category version
+(cache_helpers.get_category_version), the month and the format, so a
+category change or a new month simply stops reading the old entry.
+Repeat downloads are one cache read.
+
+Templates are written with openpyxl and the csv module directly; no
+DataFrame is built.
+"""
+
+import csv
+from io import BytesIO, StringIO
+
+from flask import current_app
+from openpyxl import Workbook
+from openpyxl.styles import Font, PatternFill, Alignment
+
+from extensions import cache
+from cache_helpers import get_category_version, record_cache_lookup
+from category_catalog import get_category_catalog
+from upload_validation import UPLOAD_COLUMNS
+from upload_readers import EXCEL_SHEET
+
+# format -> (mimetype, file extension)
+TEMPLATE_FORMATS = {
+    "excel": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+    "csv": ("text/csv", "csv"),
+}
+
+MAX_COLUMN_WIDTH = 50
+
+
+def _example_rows(categories, first_day):
+    """Example row, then an empty row for the user to fill"""
+    return [
+        [
+            first_day.strftime('%Y-%m-%d'),
+            'DEBIT',
+            '1000.00',
+            categories[0].category_name if categories else 'Food',
+        ],
+        [None] * len(UPLOAD_COLUMNS),
+    ]
+
+
+def build_excel_template(categories, first_day, last_day):
+    """Template workbook: a styled Transactions sheet and an Instructions sheet"""
+    workbook = Workbook()
+    worksheet = workbook.active
+    worksheet.title = EXCEL_SHEET
+
+    rows = _example_rows(categories, first_day)
+    worksheet.append(UPLOAD_COLUMNS)
+    for row in rows:
+        worksheet.append(row)
+
+    # Style header row
+    header_fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
+    header_font = Font(color='FFFFFF', bold=True)
+    for cell in worksheet[1]:
+        cell.fill = header_fill
+        cell.font = header_font
+        cell.alignment = Alignment(horizontal='center', vertical='center')
+
+    # Size columns to their longest value
+    for index, name in enumerate(UPLOAD_COLUMNS):
+        longest = max(len(str(value)) for value in [name] + [row[index] or '' for row in rows])
+        worksheet.column_dimensions[worksheet.cell(row=1, column=index + 1).column_letter].width = min(longest + 2, MAX_COLUMN_WIDTH)
+
+    instructions = workbook.create_sheet('Instructions')
+    instructions.append(['Instructions'])
+    instructions['A1'].font = Font(bold=True)
+    for line in [
+        'HOW TO USE THIS TEMPLATE:',
+        '',
+        '1. Fill in your transaction data in the "Transactions" sheet',
+        '2. Transaction Date must be in YYYY-MM-DD format (e.g., 2024-01-15)',
+        f'3. Date must be between {first_day.strftime("%Y-%m-%d")} and {last_day.strftime("%Y-%m-%d")}',
+        '4. Transaction Type must be either CREDIT or DEBIT',
+        '5. Amount must be a positive number (e.g., 1000.00)',
+        '6. Category Name must match one of your existing categories',
+        '',
+        'AVAILABLE CATEGORIES:',
+    ] + [f'  - {cat.category_name} ({cat.category_type})' for cat in categories[:20]]:
+        instructions.append([line or None])
+
+    output = BytesIO()
+    workbook.save(output)
+    return output.getvalue()
+
+
+def build_csv_template(categories, first_day, last_day):
+    """Template CSV: instructions as # comments, header, example row"""
+    output = StringIO()
+    for instruction in [
+        f"# Transaction Upload Template for {first_day.strftime('%B %Y')}",
+        f"# Date Range: {first_day.strftime('%Y-%m-%d')} to {last_day.strftime('%Y-%m-%d')}",
+        "# Format: Transaction Date (YYYY-MM-DD), Transaction Type (CREDIT/DEBIT), Amount, Category Name",
+        "# Example: 2024-01-15, DEBIT, 1000.00, Food",
+        f"# Available Categories: {', '.join([cat.category_name for cat in categories[:10]])}",
+        "",
+    ]:
+        output.write(instruction + '\n')
+
+    writer = csv.writer(output, lineterminator='\n')
+    writer.writerow(UPLOAD_COLUMNS)
+    writer.writerows(_example_rows(categories, first_day))
+    return output.getvalue().encode('utf-8')
+
+
+TEMPLATE_BUILDERS = {
+    "excel": build_excel_template,
+    "csv": build_csv_template,
+}
+
+
+def _template_key(user_id, file_type, first_day):
+    return (
+        f"upload_template:{user_id}:"
+        f"{get_category_version(user_id)}:{get_category_version(None)}:"
+        f"{first_day.strftime('%Y-%m')}:{file_type}"
+    )
+
+
+def get_upload_template(user_id, file_type, first_day, last_day):
+    """
+    A user's upload template for the month starting first_day.
+
+    Args:
+        file_type: A TEMPLATE_FORMATS key
+
+    Returns:
+        (bytes, download filename, mimetype)
+    """
+    mimetype, extension = TEMPLATE_FORMATS[file_type]
+    filename = f'transaction_template_{first_day.strftime("%Y_%m")}.{extension}'
+
+    key = _template_key(user_id, file_type, first_day)
+    content = cache.get(key)
+    record_cache_lookup("upload_template", content is not None)
+    if content is None:
+        categories = get_category_catalog(user_id).categories
+        content = TEMPLATE_BUILDERS[file_type](categories, first_day, last_day)
+        cache.set(key, content, timeout=current_app.config.get("UPLOAD_TEMPLATE_CACHE_TIMEOUT", 86400))
+
+    return content, filename, mimetype
@@ -0,0 +1,321 @@
+"""
+Upload Validation - Columnar Checks for Bulk Uploads
+====================================================
+Validates an uploaded transactions DataFrame column-at-a-time instead of
+walking it with iterrows():
+
+- dates: one vectorized to_datetime pass per accepted format, each only
+  over the values no earlier format matched, then a range mask
+- type / amount: normalized with string ops and to_numeric, then masks
+- category: lowercase names mapped through the user's name -> id map
+
+Every check produces a boolean mask; masks become error messages in an
+error frame, joined per row in the same order and wording as the
+per-row validator this replaces.
+
+Duplicates are found set-based too: existing_fingerprints() loads the
+user's (date, amount, category) fingerprints for the upload's date range
+in one query, and split_duplicates() flags rows matching one of them or
+an earlier row of the same file.
+
+Before any of that, row_hashes() fingerprints each raw row (SHA-256 of
+its normalized cells); rows whose hash is in imported_row_hashes() were
+imported by an earlier upload and are skipped without being validated.
+
+    result = validate_upload_frame(df, catalog.name_map(), first_day, last_day)
+    result.valid    # DataFrame: row, date, type, amount, category_id, date_text, category_text
+    result.errors   # [{'row', 'date', 'type', 'amount', 'category', 'errors'}, ...]
+
+    existing = existing_fingerprints(user_id, first_day, last_day)
+    unique, duplicate_errors = split_duplicates(result.valid, existing)
+
+    hashes = row_hashes(df)       # Series of hex digests, aligned with df
+    known = hashes.isin(imported_row_hashes(user_id, first_day, last_day))
+"""
+
+import hashlib
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from extensions import db
+from models import Transaction, UploadRowHash
+
+DATE_COLUMN = 'Transaction Date (YYYY-MM-DD)'
+TYPE_COLUMN = 'Transaction Type (CREDIT/DEBIT)'
+AMOUNT_COLUMN = 'Amount'
+CATEGORY_COLUMN = 'Category Name'
+UPLOAD_COLUMNS = [DATE_COLUMN, TYPE_COLUMN, AMOUNT_COLUMN, CATEGORY_COLUMN]
+
+DATE_FORMATS = ['%Y-%m-%d', '%Y/%m/%d', '%d-%m-%Y', '%d/%m/%Y']
+TRANSACTION_TYPES = ['CREDIT', 'DEBIT']
+
+VALID_COLUMNS = ['row', 'date', 'type', 'amount', 'category_id', 'date_text', 'category_text']
+
+
+@dataclass
+class ValidationResult:
+    """Outcome of validating one upload frame"""
+    valid: pd.DataFrame = field(default_factory=lambda: pd.DataFrame(columns=VALID_COLUMNS))
+    errors: List[dict] = field(default_factory=list)
+
+
+def _text(series):
+    """Stripped string form of a column ('nan' for missing, as str() gives)"""
+    return series.map(str).str.strip()
+
+
+def _parse_dates(raw, text):
+    """
+    Dates from a column of strings (first matching format wins) or native
+    date cells, as a datetime64 Series with NaT where nothing matched.
+    """
+    if pd.api.types.is_datetime64_any_dtype(raw):
+        return raw.dt.normalize()
+
+    parsed = pd.Series(pd.NaT, index=raw.index, dtype='datetime64[ns]')
+
+    # Spreadsheet date cells arrive as datetime objects
+    native = raw.map(lambda value: isinstance(value, (datetime, date)))
+    if native.any():
+        parsed[native] = pd.to_datetime(raw[native]).dt.normalize()
+
+    remaining = ~native & raw.notna()
+    for date_format in DATE_FORMATS:
+        if not remaining.any():
+            break
+        attempt = pd.to_datetime(text[remaining], format=date_format, errors='coerce')
+        matched = attempt.notna()
+        parsed[attempt.index[matched]] = attempt[matched]
+        remaining[attempt.index[matched]] = False
+
+    return parsed
+
+
+def _parse_amounts(raw):
+    if not pd.api.types.is_numeric_dtype(raw):
+        raw = raw.map(lambda value: value.strip() if isinstance(value, str) else value)
+    amounts = pd.to_numeric(raw, errors='coerce')
+    return amounts.where(np.isfinite(amounts))
+
+
+def validate_upload_frame(df, category_map, first_day, last_day, row_offset=2):
+    """
+    Validate an upload frame.
+
+    Args:
+        df: DataFrame with the template columns (KeyError if one is missing)
+        category_map: lowercase category name -> category_id
+        first_day, last_day: Allowed transaction date range (inclusive)
+        row_offset: Spreadsheet row number of df's first row (header is row 1)
+
+    Returns:
+        ValidationResult
+    """
+    frame = df[UPLOAD_COLUMNS]
+
+    # Skip empty rows
+    frame = frame[~frame.isna().all(axis=1)]
+    if frame.empty:
+        return ValidationResult()
+
+    raw_date = frame[DATE_COLUMN]
+    raw_type = frame[TYPE_COLUMN]
+    raw_amount = frame[AMOUNT_COLUMN]
+    raw_category = frame[CATEGORY_COLUMN]
+
+    date_text = _text(raw_date)
+    type_text = _text(raw_type).str.upper()
+    category_text = _text(raw_category)
+
+    dates = _parse_dates(raw_date, date_text)
+    amounts = _parse_amounts(raw_amount)
+    category_ids = category_text.str.lower().map(category_map)
+
+    first_day_ts, last_day_ts = pd.Timestamp(first_day), pd.Timestamp(last_day)
+
+    # One column per check; a cell holds the message where the check failed
+    date_missing = raw_date.isna()
+    date_invalid = ~date_missing & dates.isna()
+    date_out_of_range = dates.notna() & ~dates.between(first_day_ts, last_day_ts)
+    type_missing = raw_type.isna()
+    amount_missing = raw_amount.isna()
+    amount_invalid = ~amount_missing & amounts.isna()
+    category_missing = raw_category.isna()
+
+    not_found_message = "Category '" + category_text + "' not found. Please use an existing category."
+
+    checks = pd.DataFrame({
+        'date_missing': np.where(date_missing, "Transaction Date is required", ''),
+        'date_invalid': np.where(date_invalid, "Invalid date format. Use YYYY-MM-DD (e.g., 2024-01-15)", ''),
+        'date_range': np.where(date_out_of_range, f"Date must be between {first_day} and {last_day}", ''),
+        'type_missing': np.where(type_missing, "Transaction Type is required", ''),
+        'type_invalid': np.where(~type_missing & ~type_text.isin(TRANSACTION_TYPES), "Transaction Type must be CREDIT or DEBIT", ''),
+        'amount_missing': np.where(amount_missing, "Amount is required", ''),
+        'amount_invalid': np.where(amount_invalid, "Amount must be a valid number", ''),
+        'amount_positive': np.where(amounts.notna() & (amounts <= 0), "Amount must be greater than 0", ''),
+        'category_missing': np.where(category_missing, "Category Name is required", ''),
+        'category_unknown': np.where(~category_missing & category_ids.isna(), not_found_message, ''),
+    }, index=frame.index)
+
+    has_error = (checks != '').any(axis=1)
+    rows = frame.index.to_series() + row_offset
+
+    errors = []
+    if has_error.any():
+        failed = checks[has_error]
+        display_amount = amounts.where(amounts.notna() & (amounts != 0), raw_amount.map(str))
+        display_type = type_text.where(~type_missing & (type_text != ''), raw_type.map(str))
+        for index, messages in zip(failed.index, failed.itertuples(index=False)):
+            errors.append({
+                'row': int(rows[index]),
+                'date': date_text[index],
+                'type': display_type[index],
+                'amount': display_amount[index],
+                'category': category_text[index],
+                'errors': ', '.join(message for message in messages if message)
+            })
+
+    ok = ~has_error
+    valid = pd.DataFrame({
+        'row': rows[ok].astype(int),
+        'date': dates[ok].dt.date,
+        'type': type_text[ok],
+        'amount': amounts[ok].astype(float),
+        'category_id': category_ids[ok].astype(int),
+        'date_text': date_text[ok],
+        'category_text': category_text[ok],
+    })
+
+    return ValidationResult(valid=valid, errors=errors)
+
+
+# =========================
+# Duplicate detection
+# =========================
+
+def _cents(amount):
+    return int(round(amount * 100))
+
+
+def existing_fingerprints(user_id, first_day, last_day):
+    """(date, amount in cents, category_id) of a user's transactions in a date range (one query)"""
+    rows = db.session.query(
+        Transaction.transaction_date,
+        Transaction.amount,
+        Transaction.category_id
+    ).filter(
+        Transaction.user_id == user_id,
+        Transaction.transaction_date >= first_day,
+        Transaction.transaction_date <= last_day
+    ).all()
+    return {(row.transaction_date, _cents(row.amount), row.category_id) for row in rows}
+
+
+def split_duplicates(valid, existing, seen=None):
+    """
+    Separate duplicates from a validated frame: rows matching an existing
+    transaction, and repeats of an earlier row in the same file.
+
+    Args:
+        valid: Frame from validate_upload_frame()
+        existing: Set from existing_fingerprints()
+        seen: Fingerprint -> first row number, carried across the chunks
+            of one file (updated in place)
+
+    Returns:
+        (unique rows frame, duplicate error dicts)
+    """
+    if valid.empty:
+        return valid, []
+
+    seen = {} if seen is None else seen
+    cents = (valid['amount'] * 100).round().astype('int64')
+    keys = pd.MultiIndex.from_arrays([valid['date'], cents, valid['category_id']])
+    rows = valid['row'].to_numpy()
+
+    in_database = keys.isin(list(existing)) if existing else np.zeros(len(valid), dtype=bool)
+    in_earlier_chunk = keys.isin(list(seen)) if seen else np.zeros(len(valid), dtype=bool)
+    repeated = keys.duplicated(keep='first')
+    in_file = repeated | in_earlier_chunk
+
+    first_seen = ~in_file
+    seen.update(zip(keys[first_seen], rows[first_seen].tolist()))
+
+    errors = []
+    duplicates = in_database | in_file
+    for position in np.flatnonzero(duplicates):
+        record = valid.iloc[position]
+        if in_database[position]:
+            message = "Duplicate transaction already exists in database"
+        else:
+            message = f"Duplicate of row {seen[keys[position]]} in this file"
+        errors.append({
+            'row': int(record['row']),
+            'date': record['date_text'],
+            'type': record['type'],
+            'amount': float(record['amount']),
+            'category': record['category_text'],
+            'errors': message
+        })
+
+    return valid[~duplicates], errors
+
+
+# =========================
+# Row fingerprints
+# =========================
+
+def _cell_text(series):
+    """Stripped string form of a column, '' for missing"""
+    return series.map(lambda value: '' if pd.isna(value) else str(value).strip())
+
+
+def _date_key(raw):
+    """Dates as parsed by _parse_dates(), as YYYY-MM-DD; unparseable cells as written"""
+    dates = _parse_dates(raw, _text(raw))
+    return dates.dt.strftime('%Y-%m-%d').where(dates.notna(), _cell_text(raw))
+
+
+def row_hashes(df):
+    """
+    SHA-256 of each raw upload row, normalized so the same transaction
+    hashes alike from CSV or Excel and in any accepted date format:
+    dates as YYYY-MM-DD, amounts with two decimals, type upper-case,
+    category lower-case.
+
+    Returns:
+        Series of hex digests indexed like df
+    """
+    frame = df[UPLOAD_COLUMNS]
+    raw_amount = frame[AMOUNT_COLUMN]
+    amounts = _parse_amounts(raw_amount)
+
+    normalized = (
+        _date_key(frame[DATE_COLUMN])
+        + '\x1f' + _cell_text(frame[TYPE_COLUMN]).str.upper()
+        + '\x1f' + amounts.map('{:.2f}'.format).where(amounts.notna(), _cell_text(raw_amount))
+        + '\x1f' + _cell_text(frame[CATEGORY_COLUMN]).str.lower()
+    )
+    return normalized.map(lambda text: hashlib.sha256(text.encode('utf-8')).hexdigest())
+
+
+def imported_row_hashes(user_id, first_day, last_day):
+    """
+    Row hashes of uploads already imported into a date range whose
+    transactions still exist (one query)
+    """
+    rows = (
+        db.session.query(UploadRowHash.row_hash)
+        .join(Transaction, Transaction.transaction_id == UploadRowHash.transaction_id)
+        .filter(
+            UploadRowHash.user_id == user_id,
+            UploadRowHash.transaction_date >= first_day,
+            UploadRowHash.transaction_date <= last_day
+        )
+        .all()
+    )
+    return {row.row_hash for row in rows}
@@ -0,0 +1,78 @@
+"""
+User Balances: Verify / Repair
+==============================
+Recomputes every user's balance from the transactions table and
+compares it with the materialized user_balances ledger.
+
+    python verify_balances.py            # report drift only
+    python verify_balances.py --repair   # report and fix drift
+
+Also creates the user_balances table if it does not exist, so the first
+run with --repair doubles as the backfill.
+"""
+
+import argparse
+from datetime import datetime
+from decimal import Decimal
+
+from app import app
+from extensions import db
+from models import UserBalance
+from ledger import compute_balances
+
+
+def verify(repair=False, user_id=None):
+    with app.app_context():
+        try:
+            UserBalance.__table__.create(db.engine, checkfirst=True)
+
+            expected = compute_balances(user_id)
+            stored_query = UserBalance.query
+            if user_id:
+                stored_query = stored_query.filter_by(user_id=user_id)
+            stored = {row.user_id: row for row in stored_query.all()}
+
+            drift = []
+            for uid in sorted(set(expected) | set(stored)):
+                expected_balance = expected.get(uid, Decimal("0"))
+                row = stored.get(uid)
+                stored_balance = row.balance if row is not None else None
+                if stored_balance is None or Decimal(stored_balance) != expected_balance:
+                    drift.append((uid, stored_balance, expected_balance))
+
+            print(f"[INFO] Checked {len(set(expected) | set(stored))} user balances")
+            for uid, stored_balance, expected_balance in drift:
+                shown = "missing" if stored_balance is None else stored_balance
+                print(f"  - {uid}: stored={shown} expected={expected_balance}")
+
+            if not drift:
+                print("[OK] No drift detected")
+                return 0
+
+            print(f"[WARNING] {len(drift)} balance(s) drifted")
+
+            if repair:
+                for uid, _, expected_balance in drift:
+                    row = stored.get(uid)
+                    if row is None:
+                        db.session.add(UserBalance(user_id=uid, balance=expected_balance))
+                    else:
+                        row.balance = expected_balance
+                        row.updated_at = datetime.utcnow()
+                db.session.commit()
+                print(f"[OK] Repaired {len(drift)} balance(s)")
+
+            return len(drift)
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"[ERROR] Balance verification failed: {e}")
+            raise
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verify and optionally repair materialized user balances")
+    parser.add_argument("--repair", action="store_true", help="Rewrite drifted balances")
+    parser.add_argument("--user-id", help="Check a single user")
+    args = parser.parse_args()
+    verify(repair=args.repair, user_id=args.user_id)